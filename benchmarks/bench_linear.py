@@ -0,0 +1,105 @@
+"""Compare the exact-rational fast path of /solve against the SymPy path.
+
+Run from the repository root:
+
+    python benchmarks/bench_linear.py [--count 2000] [--seed 1]
+
+Every equation is solved through both paths; the script fails if any
+response differs and prints per-equation latency for each.
+
+The SymPy side is the fallback as it is in this tree, with the current
+parser and step records, not /solve as it was before the fast path, so
+the ratio printed is SymPy path vs fast path.  For before/after numbers,
+save a bench_suite.py baseline on the older commit and compare against it.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mathchat import linear  # noqa: E402
+
+
+def _num(rng, lo=1, hi=9999):
+    return str(rng.randint(lo, hi))
+
+
+def _term(rng, var):
+    c = rng.choice(["", _num(rng, 1, 99), _num(rng, 1, 99) + "/" + _num(rng, 2, 9)])
+    if "/" in c:
+        return f"{c}*{var}" if rng.random() < 0.5 else f"{var}/{_num(rng, 2, 9)}"
+    return f"{c}{var}"
+
+
+def real_looking_equation(rng):
+    var = rng.choice("xxxxyzabnt")
+    shapes = [
+        lambda: f"{_term(rng, var)}+{_num(rng)} = {_num(rng)}-{_term(rng, var)}",
+        lambda: f"{_num(rng, 2, 12)}({var} - {_num(rng, 1, 50)}) = {_term(rng, var)} + {_num(rng, 1, 99)}",
+        lambda: f"{_term(rng, var)} + {_num(rng, 1, 40)} = {_num(rng, 1, 400)}",
+        lambda: f"-{_term(rng, var)} − {_num(rng)} = {_num(rng)}",
+        lambda: f"{_num(rng, 1, 9)} - {_num(rng, 2, 6)}({var}+{_num(rng, 1, 9)}) = {_term(rng, var)}",
+        lambda: f"({var} + {_num(rng, 1, 20)})/{_num(rng, 2, 9)} = {_num(rng, 1, 20)}",
+        lambda: f"{_term(rng, var)} = {_term(rng, var)}",
+    ]
+    return rng.choice(shapes)()
+
+
+def _sympy_only(eq):
+    error, eqn = linear.split_equation(eq)
+    if error is not None:
+        return error
+    return linear._solve_sympy(eqn)
+
+
+def _time(fn, corpus):
+    samples = []
+    results = []
+    for eq in corpus:
+        t0 = time.perf_counter()
+        results.append(fn(eq))
+        samples.append(time.perf_counter() - t0)
+    return samples, results
+
+
+def _report(label, samples):
+    ordered = sorted(samples)
+    p95 = ordered[int(0.95 * (len(ordered) - 1))]
+    print(f"{label:>12}: mean {statistics.mean(samples) * 1e3:8.3f} ms"
+          f"  p50 {statistics.median(samples) * 1e3:8.3f} ms  p95 {p95 * 1e3:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = [real_looking_equation(rng) for _ in range(args.count)]
+
+    # warm SymPy's caches so neither side pays first-call costs
+    for eq in corpus[:20]:
+        _sympy_only(eq)
+        linear.solve_equation(eq)
+
+    fast_samples, fast_results = _time(linear.solve_equation, corpus)
+    slow_samples, slow_results = _time(_sympy_only, corpus)
+
+    mismatches = [eq for eq, a, b in zip(corpus, fast_results, slow_results) if a != b]
+    for eq in mismatches[:10]:
+        print(f"MISMATCH: {eq!r}")
+
+    print(f"{len(corpus)} equations")
+    _report("sympy path", slow_samples)
+    _report("fast path", fast_samples)
+    print(f"SymPy path vs fast path: {sum(slow_samples) / sum(fast_samples):.1f}x")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
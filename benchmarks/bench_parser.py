@@ -0,0 +1,101 @@
+"""Micro-benchmark of the single-pass parser against preprocess + sympify.
+
+Run from the repository root:
+
+    python benchmarks/bench_parser.py [--count 2000] [--seed 1]
+
+Both grammars are measured: equation sides as /solve reads them (implicit
+multiplication, preprocess_side) and expressions as /simplify reads them
+(preprocess_expr).  The script fails if the parser builds a different
+expression than sympify for any input it accepts.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sympy as sp  # noqa: E402
+
+from bench_linear import real_looking_equation  # noqa: E402
+from mathchat.parsing import Unsupported, parse_sympy, preprocess_expr, preprocess_side, tokenize  # noqa: E402
+
+
+def _expression(rng):
+    var = rng.choice("xyz")
+    terms = []
+    for _ in range(rng.randint(2, 6)):
+        c = rng.randint(1, 50)
+        p = rng.randint(0, 4)
+        terms.append(f"{c}*{var}^{p}" if p else str(c))
+    expr = rng.choice([" + ", " - "]).join(terms)
+    shapes = [
+        lambda: expr,
+        lambda: f"({expr})^{rng.randint(2, 3)}",
+        lambda: f"({expr})/({var} + {rng.randint(1, 9)})",
+        lambda: f"({var} − {rng.randint(1, 9)})*({expr})",
+    ]
+    return rng.choice(shapes)()
+
+
+def _measure(fn, corpus, repeat):
+    samples = []
+    for text in corpus:
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            fn(text)
+        samples.append((time.perf_counter() - t0) / repeat)
+    return samples
+
+
+def _compare(label, corpus, implicit_mul, preprocess, repeat):
+    def new(text):
+        return parse_sympy(tokenize(text, implicit_mul))
+
+    def old(text):
+        return sp.sympify(preprocess(text))
+
+    accepted = []
+    mismatches = 0
+    for text in corpus:
+        try:
+            mine = new(text)
+        except Unsupported:
+            continue
+        accepted.append(text)
+        if sp.srepr(mine) != sp.srepr(old(text)):
+            mismatches += 1
+            print(f"MISMATCH ({label}): {text!r}")
+
+    new_t = _measure(new, accepted, repeat)
+    old_t = _measure(old, accepted, repeat)
+    print(f"{label}: {len(accepted)}/{len(corpus)} inputs handled by the parser")
+    print(f"  preprocess + sympify: mean {statistics.mean(old_t) * 1e6:8.1f} us")
+    print(f"  tokenize + parse:     mean {statistics.mean(new_t) * 1e6:8.1f} us")
+    print(f"  speed-up: {sum(old_t) / sum(new_t):.1f}x")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sides = []
+    for _ in range(args.count // 2):
+        sides.extend(real_looking_equation(rng).split("="))
+    expressions = [_expression(rng) for _ in range(args.count)]
+
+    mismatches = _compare("/solve sides", sides, True, preprocess_side, args.repeat)
+    mismatches += _compare("/simplify expressions", expressions, False, preprocess_expr, args.repeat)
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
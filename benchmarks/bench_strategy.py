@@ -0,0 +1,103 @@
+"""Strategy selector vs blanket sp.simplify: latency and result equivalence.
+
+Run from the repository root:
+
+    python benchmarks/bench_strategy.py [--scale 1.0] [--seed 1] [--repeat 3] [--show]
+
+Every /simplify corpus from corpora.py is parsed once and run through the
+pipeline with SIMPLIFY_STRATEGY=full (expand, sp.simplify, factor) and
+with the default strategy selector, SymPy's cache cleared before each
+call.  Per corpus and per expression class the report gives the median
+time of both and the speedup, and how the results compare:
+
+    same        identical result text
+    equivalent  different text, but the difference simplifies to 0
+    different   anything else (listed; the run exits with status 1)
+
+--show also lists the inputs whose text differs.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sympy  # noqa: E402
+from sympy.core.cache import clear_cache  # noqa: E402
+
+import corpora  # noqa: E402
+import mathchat  # noqa: E402
+from mathchat.parsing import normalize  # noqa: E402
+from mathchat.simplify import parse_expr, run_pipeline  # noqa: E402
+from mathchat.strategy import classify  # noqa: E402
+
+
+def _time(expr, strategy_name, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        clear_cache()
+        t0 = time.perf_counter()
+        body, _ = run_pipeline(expr, strategy_name=strategy_name)
+        best = min(best, time.perf_counter() - t0)
+    return best, body["result"]
+
+
+def _compare(old, new):
+    if old == new:
+        return "same"
+    try:
+        if sympy.simplify(sympy.sympify(old) - sympy.sympify(new)) == 0:
+            return "equivalent"
+    except Exception:
+        pass
+    return "different"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--show", action="store_true", help="list every input whose result text changed")
+    args = parser.parse_args()
+
+    mathchat.warm()
+    rows = {}
+    changed = []
+    for name, (target, corpus) in corpora.build(args.seed, args.scale).items():
+        if target != "simplify":
+            continue
+        for text in corpus:
+            expr = parse_expr(*normalize(text))
+            kind = classify(sympy.expand(expr))[0]
+            old_t, old = _time(expr, "full", args.repeat)
+            new_t, new = _time(expr, "auto", args.repeat)
+            verdict = _compare(old, new)
+            for key in (name, f"  {kind}"):
+                row = rows.setdefault(key, dict(old=[], new=[], same=0, equivalent=0, different=0))
+                row["old"].append(old_t)
+                row["new"].append(new_t)
+                row[verdict] += 1
+            if verdict != "same":
+                changed.append((verdict, text, old, new))
+
+    print(f"{'corpus / class':<26}{'n':>5}{'full ms':>10}{'auto ms':>10}{'speedup':>9}"
+          f"{'same':>7}{'equiv':>7}{'diff':>6}")
+    # corpora first, then the classes over all corpora
+    for key in sorted(rows, key=lambda k: (k.startswith(" "), k)):
+        row = rows[key]
+        old_ms = statistics.median(row["old"]) * 1e3
+        new_ms = statistics.median(row["new"]) * 1e3
+        print(f"{key:<26}{len(row['old']):>5}{old_ms:>10.3f}{new_ms:>10.3f}{old_ms / new_ms:>8.1f}x"
+              f"{row['same']:>7}{row['equivalent']:>7}{row['different']:>6}")
+
+    for verdict, text, old, new in changed:
+        if verdict == "different" or args.show:
+            print(f"{verdict.upper()}: {text}\n    full: {old}\n    auto: {new}")
+    return 1 if any(verdict == "different" for verdict, *_ in changed) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""Benchmark suite for /solve and /simplify with baseline comparison.
+
+Run from the repository root:
+
+    python benchmarks/bench_suite.py [--scale 1.0] [--seed 1] [--repeat 3] [--only NAME]
+    python benchmarks/bench_suite.py --save benchmarks/baseline.json
+    python benchmarks/bench_suite.py --baseline benchmarks/baseline.json [--threshold 0.25]
+
+Each corpus from corpora.py is run twice: through the engine functions
+directly and through the Flask app's test client, both in-process and with
+the result caches and SymPy's cache cleared before every run.  Each input's
+time is the best of --repeat runs; the report gives throughput and
+p50/p95/p99 latency per corpus and mode.
+
+With --baseline, the run fails if a p50 or p95 is more than --threshold
+(a fraction) slower than the saved one, or if the responses differ from
+the baseline's (their digest is stored with the timings).  Baselines are
+only comparable on the same machine with the same --seed and --scale.
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sympy  # noqa: E402
+from sympy.core.cache import clear_cache  # noqa: E402
+
+import corpora  # noqa: E402
+import mathchat  # noqa: E402
+from mathchat import web  # noqa: E402
+from mathchat.linear import solve_equation  # noqa: E402
+from mathchat.simplify import simplify_expression  # noqa: E402
+
+MODES = ("direct", "flask")
+
+
+class _Target:
+    def __init__(self, route, field, engine_fn):
+        self.route = route
+        self.field = field
+        self.engine_fn = engine_fn
+        self.client = web.app.test_client()
+
+    def direct(self, text):
+        return self.engine_fn(text)[0]
+
+    def flask(self, text):
+        return self.client.post(self.route, json={self.field: text}).get_json()
+
+    def reset(self):
+        web.cache.clear()
+        clear_cache()
+
+
+def _percentile(ordered, q):
+    # nearest-rank percentile of an already sorted list
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def _run(target, mode, corpus, repeat):
+    call = getattr(target, mode)
+    samples = [float("inf")] * len(corpus)
+    for _ in range(repeat):
+        target.reset()
+        bodies = []
+        for i, text in enumerate(corpus):
+            t0 = time.perf_counter()
+            bodies.append(call(text))
+            samples[i] = min(samples[i], time.perf_counter() - t0)
+    ordered = sorted(samples)
+    digest = hashlib.sha256(json.dumps(bodies, sort_keys=True).encode()).hexdigest()
+    return dict(
+        count=len(corpus),
+        throughput=len(corpus) / sum(samples),
+        p50_ms=_percentile(ordered, 0.50) * 1e3,
+        p95_ms=_percentile(ordered, 0.95) * 1e3,
+        p99_ms=_percentile(ordered, 0.99) * 1e3,
+        digest=digest[:16],
+    )
+
+
+def _compare(results, baseline, threshold):
+    failures = []
+    for key, current in results.items():
+        saved = baseline["results"].get(key)
+        if saved is None:
+            continue
+        if current["digest"] != saved["digest"]:
+            failures.append(f"{key}: responses differ from the baseline")
+        for stat in ("p50_ms", "p95_ms"):
+            if current[stat] > saved[stat] * (1 + threshold):
+                failures.append(f"{key}: {stat} {current[stat]:.3f} vs baseline {saved[stat]:.3f}"
+                                f" (+{current[stat] / saved[stat] - 1:.0%})")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", action="append", help="run only this corpus (repeatable)")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a new baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    args = parser.parse_args()
+
+    targets = {
+        "solve": _Target("/solve", "equation", solve_equation),
+        "simplify": _Target("/simplify", "expression", simplify_expression),
+    }
+    suites = corpora.build(args.seed, args.scale)
+    if args.only:
+        unknown = set(args.only) - set(suites)
+        if unknown:
+            parser.error(f"unknown corpus: {', '.join(sorted(unknown))} (have {', '.join(suites)})")
+        suites = {name: suites[name] for name in args.only}
+
+    # warm SymPy's caches and lazy imports so the first corpus pays no start-up costs
+    mathchat.warm()
+
+    results = {}
+    print(f"{'corpus':<24}{'mode':<8}{'n':>6}{'items/s':>11}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, (target_name, corpus) in suites.items():
+        target = targets[target_name]
+        for mode in MODES:
+            stats = _run(target, mode, corpus, args.repeat)
+            results[f"{name}/{mode}"] = stats
+            print(f"{name:<24}{mode:<8}{stats['count']:>6}{stats['throughput']:>11.1f}"
+                  f"{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}")
+
+    meta = dict(seed=args.seed, scale=args.scale, repeat=args.repeat, python=platform.python_version(),
+                sympy=sympy.__version__, machine=platform.machine())
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        saved = baseline["meta"]
+        if (saved["seed"], saved["scale"]) != (args.seed, args.scale):
+            print(f"baseline was recorded with --seed {saved['seed']} --scale {saved['scale']}; not comparable")
+            return 2
+        failures = _compare(results, baseline, args.threshold)
+        for line in failures:
+            print(f"REGRESSION: {line}")
+        if not failures:
+            print(f"no regressions above {args.threshold:.0%} against {args.baseline}")
+        status = 1 if failures else 0
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(dict(meta=meta, results=results), f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline written to {args.save}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
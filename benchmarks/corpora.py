@@ -0,0 +1,141 @@
+"""Generated input corpora for the benchmark suite.
+
+Every generator takes a random.Random, so a seed reproduces the same inputs.
+Sizes are multiplied by `scale`; the pathological corpora are fixed lists.
+"""
+import random
+
+
+def _coeff(rng, digits):
+    return str(rng.randint(10 ** (digits - 1), 10 ** digits - 1))
+
+
+def linear_equations(rng, count, digits):
+    """One-unknown linear equations with coefficients of `digits` digits."""
+    corpus = []
+    for _ in range(count):
+        var = rng.choice("xyzt")
+        a, b, c, d = (_coeff(rng, digits) for _ in range(4))
+        shapes = [
+            f"{a}{var} + {b} = {c}",
+            f"{a}{var} - {b} = {c}{var} + {d}",
+            f"{a}({var} - {b}) = {c}",
+            f"({var} + {a})/{b} = {c}/{d}",
+            f"{a}/{b}*{var} + {c} = {d}",
+            f"-{a}{var} − {b} = {c} - {d}{var}",
+        ]
+        corpus.append(rng.choice(shapes))
+    return corpus
+
+
+def polynomials(rng, max_degree, per_degree):
+    """Expressions of growing degree and term count: products, powers and sums."""
+    corpus = []
+    for degree in range(1, max_degree + 1):
+        for _ in range(per_degree):
+            var = rng.choice("xyz")
+            terms = [f"{rng.randint(1, 20)}*{var}^{p}" for p in range(degree, 0, -1)
+                     if rng.random() < 0.7]
+            terms.append(str(rng.randint(1, 20)))
+            poly = " + ".join(terms)
+            roots = [rng.randint(-9, 9) for _ in range(degree)]
+            shapes = [
+                poly,
+                "*".join(f"({var} - {r})" for r in roots),
+                f"({var} + {rng.randint(1, 9)})^{degree}",
+                f"({poly}) - ({poly})",
+            ]
+            corpus.append(rng.choice(shapes))
+    return corpus
+
+
+def rational_functions(rng, count):
+    """Quotients with common factors, partial fractions and nested fractions."""
+    corpus = []
+    for _ in range(count):
+        var = rng.choice("xyz")
+        a, b, c = (rng.randint(1, 9) for _ in range(3))
+        shapes = [
+            f"({var}^2 - {a * a})/({var} - {a})",
+            f"1/({var} + {a}) + 1/({var} - {b})",
+            f"({var}^3 + {a}*{var}^2)/({var}^2 + {b}*{var})",
+            f"({var} + {a})/({var}^2 + {a + b}*{var} + {a * b})",
+            f"(1 + 1/{var})/(1 - 1/{var}^{c})",
+            f"{a}/({var} - {b}) - {a}/({var} + {b})",
+        ]
+        corpus.append(rng.choice(shapes))
+    return corpus
+
+
+def elementary_functions(rng, count):
+    """Trigonometric, exponential, logarithmic and radical expressions."""
+    corpus = []
+    for _ in range(count):
+        var = rng.choice("xyz")
+        a, b = rng.randint(2, 9), rng.randint(1, 9)
+        shapes = [
+            f"sin({var})^2 + cos({var})^2 + {b}",
+            f"sin({a}*{var})/cos({a}*{var})",
+            f"exp({var})*exp({a}*{var})",
+            f"{a}^{var}*{a}^{b}",
+            f"log({var}) + log({a})",
+            f"sqrt({var})*sqrt({var}^{a})",
+            f"(exp({var}) + 1)^2 - exp({a}*{var})",
+            f"cosh({var})^2 - sinh({var})^2",
+            f"sin({var})*cos({var})/(1 + {b}*{var})",
+            f"exp(log({var}^{a}))",
+        ]
+        corpus.append(rng.choice(shapes))
+    return corpus
+
+
+def pathological_equations():
+    """/solve inputs that are large, deep or take the slow paths."""
+    big = "9" * 300
+    return [
+        f"{big}x + {big} = {big}7",
+        " + ".join(f"{i}x" for i in range(1, 400)) + " = 1",
+        "(" * 150 + "x + 1" + ")" * 150 + " = 2",
+        "x^200 = 1",
+        "(x + 1)^30 = x^30",
+        "0.5x + 0.25 = 0.125",
+        "1/x + x = 1/x + 2",
+        "x/7 + x/11 + x/13 + x/17 + x/19 = 1/23",
+        "x*" * 100 + "1 = 0",
+        "2x = 2x",
+    ]
+
+
+def pathological_expressions():
+    """/simplify inputs with large intermediate expressions or deep nesting."""
+    return [
+        "(x + 1)^25",
+        "(x + y + z)^8",
+        "(x + 1)^12/(x + 1)^11",
+        "(" * 150 + "x" + ")" * 150,
+        " + ".join(f"x^{i}" for i in range(1, 120)),
+        "*".join(f"(x - {i})" for i in range(1, 16)),
+        "(x^2 - 1)^4/(x - 1)^4",
+        "1/(1/(1/(1/(1/(1/(x + 1) + 1) + 1) + 1) + 1) + 1)",
+        "9" * 500 + "*x - " + "9" * 500 + "*x",
+        "x^1000 - x^999",
+    ]
+
+
+def build(seed=1, scale=1.0):
+    """All corpora as {name: (target, [inputs])}, target being "solve" or "simplify"."""
+    rng = random.Random(seed)
+
+    def n(count):
+        return max(1, int(count * scale))
+
+    return {
+        "linear-1-digit": ("solve", linear_equations(rng, n(400), 1)),
+        "linear-4-digit": ("solve", linear_equations(rng, n(400), 4)),
+        "linear-12-digit": ("solve", linear_equations(rng, n(200), 12)),
+        "solve-pathological": ("solve", pathological_equations()),
+        "polynomial-degree": ("simplify", polynomials(rng, 8, n(6))),
+        "rational-functions": ("simplify", rational_functions(rng, n(40))),
+        "elementary-functions": ("simplify", elementary_functions(rng, n(40))),
+        "simplify-pathological": ("simplify", pathological_expressions()),
+    }
@@ -0,0 +1,16 @@
+"""Step-by-step linear equation solver and expression simplifier.
+
+The Flask app serving both lives in mathchat.web; the engines behind it
+(mathchat.linear, mathchat.system, mathchat.simplify) can be used on their
+own and return (response_dict, http_status) tuples.
+"""
+
+def warm():
+    """Import SymPy and run each engine and pipeline stage once.
+
+    SymPy is imported lazily, so a process that should answer its first
+    request at full speed calls this before taking traffic.  Returns the
+    seconds it took; see mathchat.warmup.
+    """
+    from .warmup import warm
+    return warm()
@@ -0,0 +1,22 @@
+import importlib
+
+# -------------------
+# Lazy SymPy import
+#
+# Importing sympy takes most of a second, so the modules of this package use
+# the `sp` proxy below instead of `import sympy as sp`.  The real import
+# happens on first attribute access (the first request, or warm()), after
+# which looked-up attributes are stored on the proxy and cost a plain
+# attribute lookup.
+# -------------------
+
+class _LazyModule:
+    def __init__(self, name):
+        self._lazy_name = name
+
+    def __getattr__(self, attr):
+        value = getattr(importlib.import_module(self._lazy_name), attr)
+        setattr(self, attr, value)
+        return value
+
+sp = _LazyModule("sympy")
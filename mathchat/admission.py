@@ -0,0 +1,214 @@
+from collections import namedtuple
+import math
+import re
+import sys
+from .env import env_int
+
+# -------------------
+# Admission control before sympify
+#
+# sympify evaluates what it parses: 9**9**9**9 is computed digit by digit
+# and (x+1)**100000 is expanded by the first stage, long before any step
+# could time out.  measure() estimates what an input will cost from its
+# tokens alone, in one pass with an explicit operator stack (no recursion,
+# so nesting depth is measured safely too).  For each subexpression it
+# tracks a bound on the number of digits if it is a plain number, its
+# polynomial degree and how many terms it has once expanded.
+#
+# Inputs over a limit are rejected with a message naming it; inputs whose
+# estimated degree is over ADMISSION_FACTOR_MAX_DEGREE (and are not sparse)
+# are simplified without the factor stage.  Limits come from ADMISSION_MAX_*.
+# -------------------
+
+MAX_DEPTH = env_int("ADMISSION_MAX_DEPTH", 200)
+# every result is printed, and Python refuses to print integers longer than
+# sys.get_int_max_str_digits() (0 when unlimited); one digit is kept in hand
+# because the estimate can be one short (log10(10**n) is n)
+_STR_DIGITS = getattr(sys, "get_int_max_str_digits", lambda: 0)()
+MAX_DIGITS = env_int("ADMISSION_MAX_DIGITS", 10000)
+if _STR_DIGITS:
+    MAX_DIGITS = min(MAX_DIGITS, _STR_DIGITS - 1)
+MAX_EXPONENT = env_int("ADMISSION_MAX_EXPONENT", 1000)
+MAX_DEGREE = env_int("ADMISSION_MAX_DEGREE", 1000)
+MAX_TERMS = env_int("ADMISSION_MAX_TERMS", 10000)
+FACTOR_MAX_DEGREE = env_int("ADMISSION_FACTOR_MAX_DEGREE", 100)
+# expansions with at most this many terms factor quickly at any degree
+SPARSE_TERMS = 10
+
+Cost = namedtuple("Cost", "depth digits exponent degree terms")
+
+# for inputs the tokenizer rejects: scan the preprocessed text loosely
+_SCAN_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<num>[0-9]*\.?[0-9]+)
+  | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<op>\*\*|[-+*/()\[\],])
+  | (?P<other>.)
+""", re.VERBOSE)
+
+_PRECEDENCE = {",": 0, "+": 1, "-": 1, "*": 2, "/": 2, "neg": 3, "fn": 3, "**": 4}
+_OPEN = ("(", "[")
+_CLOSE = (")", "]")
+
+def _scan(text):
+    return [(m.lastgroup, m.group()) for m in _SCAN_RE.finditer(text) if m.lastgroup != "ws"]
+
+def _times(a, b):
+    # product of bounds where 0 * inf is 0
+    return 0 if a == 0 or b == 0 else a * b
+
+def _literal_digits(text):
+    whole = text.split(".")[0].lstrip("0")
+    if len(whole) > 15:
+        return float(len(whole))
+    return math.log10(max(float(text), 1.0))
+
+def _monomials(degree, variables):
+    # monomials of at most this degree in this many variables: C(degree + v, v)
+    if math.isinf(degree):
+        return math.inf
+    log_count = math.lgamma(degree + variables + 1) - math.lgamma(degree + 1) - math.lgamma(variables + 1)
+    return math.inf if log_count > 700 else math.exp(log_count)
+
+def _power_terms(terms, exponent):
+    # terms of (t1 + ... + tn)**e once expanded: C(e + n - 1, n - 1)
+    if terms <= 1 or exponent <= 1:
+        return terms
+    if math.isinf(terms) or exponent > 1e6:
+        return math.inf
+    e = int(exponent)
+    n = int(terms)
+    log_count = math.lgamma(e + n) - math.lgamma(e + 1) - math.lgamma(n)
+    return math.inf if log_count > 700 else math.exp(log_count)
+
+class _Estimate:
+    # values are (digits, degree, terms); digits is None for anything with a symbol
+    def __init__(self):
+        self.values = []
+        self.digits = 0.0
+        self.exponent = 0.0
+        self.degree = 0.0
+        self.terms = 1.0
+
+    def push(self, digits, degree, terms):
+        self.values.append((digits, degree, terms))
+        if digits is not None:
+            self.digits = max(self.digits, digits)
+        self.degree = max(self.degree, degree)
+        self.terms = max(self.terms, terms)
+
+    def apply(self, op):
+        if op in ("neg", "fn"):
+            digits, degree, terms = self.values.pop()
+            self.push(digits if op == "neg" else None, degree, terms if op == "neg" else 1)
+            return
+        b_digits, b_degree, b_terms = self.values.pop()
+        a_digits, a_degree, a_terms = self.values.pop()
+        both = a_digits is not None and b_digits is not None
+        if op in ("+", "-", ","):
+            self.push(max(a_digits, b_digits) + 0.302 if both else None,
+                      max(a_degree, b_degree), a_terms + b_terms)
+        elif op == "*":
+            self.push(a_digits + b_digits if both else None, a_degree + b_degree, a_terms * b_terms)
+        elif op == "/":
+            self.push(a_digits if both else None, a_degree + b_degree, a_terms)
+        else:
+            # a ** b: b's size, when known, is the exponent
+            if b_digits is None:
+                self.push(None, a_degree, a_terms)
+                return
+            # rounded so 10 ** log10(1000) compares equal to 1000
+            exponent = math.inf if b_digits > 300 else float(f"{10 ** b_digits:.9g}")
+            if a_digits is None:
+                self.exponent = max(self.exponent, exponent)
+            self.push(_times(a_digits, exponent) if a_digits is not None else None,
+                      _times(a_degree, exponent), _power_terms(a_terms, exponent))
+
+def measure(text, tokens=None):
+    """Estimate an input's cost from its tokens (or a loose scan of text)."""
+    if tokens is None:
+        tokens = _scan(text)
+    est = _Estimate()
+    ops = []
+    depth = max_depth = 0
+    literal = 0
+    names = set()
+    prev = None
+    try:
+        for kind, value in tokens:
+            if kind == "num":
+                literal = max(literal, len(value))
+                est.push(_literal_digits(value), 0, 1)
+            elif kind == "name":
+                names.add(value)
+                est.push(None, 1, 1)
+            elif value in _OPEN:
+                depth += 1
+                max_depth = max(max_depth, depth)
+                if prev is not None and prev[0] == "name":
+                    # a function call: its value replaces the name's
+                    est.values.pop()
+                    names.discard(prev[1])
+                    ops.append("fn")
+                ops.append("(")
+            elif value in _CLOSE:
+                depth -= 1
+                while ops and ops[-1] != "(":
+                    est.apply(ops.pop())
+                if ops:
+                    ops.pop()
+                if ops and ops[-1] == "fn":
+                    est.apply(ops.pop())
+            elif kind == "op":
+                unary = value in "+-" and (prev is None or (prev[0] == "op" and prev[1] not in _CLOSE))
+                if unary:
+                    if value == "-":
+                        ops.append("neg")
+                else:
+                    precedence = _PRECEDENCE[value]
+                    while ops and ops[-1] != "(" and (
+                            _PRECEDENCE[ops[-1]] > precedence
+                            or (_PRECEDENCE[ops[-1]] == precedence and value != "**")):
+                        est.apply(ops.pop())
+                    ops.append(value)
+            else:
+                # outside what the estimate understands; keep what was measured
+                break
+            prev = (kind, value)
+        else:
+            while ops:
+                op = ops.pop()
+                if op != "(":
+                    est.apply(op)
+    except IndexError:
+        # malformed input (sympify will reject it); the partial estimate stands
+        pass
+    digits = est.digits if math.isinf(est.digits) else math.ceil(est.digits)
+    # products overcount terms that combine, (x+1)*(x+2) has 3 not 4
+    terms = min(est.terms, _monomials(est.degree, len(names))) if names else est.terms
+    return Cost(depth=max_depth, digits=max(literal, digits),
+                exponent=est.exponent, degree=est.degree, terms=terms)
+
+def _size(value):
+    if math.isinf(value):
+        return "over 10^300"
+    return f"about {value:.3g}" if value >= 1e6 else f"{value:.0f}"
+
+def check(text, tokens=None):
+    """Return (cost, error_message); the message is None if the input is admitted."""
+    cost = measure(text, tokens)
+    if cost.depth > MAX_DEPTH:
+        return cost, f"Input too complex: parentheses nested {cost.depth} deep (limit {MAX_DEPTH})."
+    if cost.digits > MAX_DIGITS:
+        return cost, f"Input too complex: a number with {_size(cost.digits)} digits (limit {MAX_DIGITS})."
+    if cost.exponent > MAX_EXPONENT:
+        return cost, f"Input too complex: exponent {_size(cost.exponent)} (limit {MAX_EXPONENT})."
+    if cost.degree > MAX_DEGREE:
+        return cost, f"Input too complex: degree {_size(cost.degree)} (limit {MAX_DEGREE})."
+    if cost.terms > MAX_TERMS:
+        return cost, f"Input too complex: {_size(cost.terms)} terms once expanded (limit {MAX_TERMS})."
+    return cost, None
+
+def skip_factor(cost):
+    """Whether factoring is expected to be too slow for this input."""
+    return cost.degree > FACTOR_MAX_DEGREE and cost.terms > SPARSE_TERMS
@@ -0,0 +1,135 @@
+from collections import OrderedDict
+import sys
+import threading
+import time
+from .env import env_float, env_int
+
+# -------------------
+# Bounded LRU cache for endpoint results
+#
+# Values are the (response_dict, http_status) tuples returned by the engines
+# and must be treated as read-only once stored.  Limits:
+#   max_entries  - entry count (always enforced)
+#   max_bytes    - rough memory budget, estimated with sys.getsizeof
+#   ttl          - seconds an entry stays valid
+# With a DiskStore (mathchat.store) attached, keys in the PERSISTED
+# namespaces are also written to disk and looked up there on a miss.
+# -------------------
+
+# the structural keys: looked up only once the expensive work is due, so
+# cheap fast-path results never pay for a disk read
+PERSISTED = frozenset({"simplify-srepr", "solve-srepr"})
+
+def _approx_size(value):
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += _approx_size(k) + _approx_size(v)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            size += _approx_size(v)
+    return size
+
+class ResultCache:
+    def __init__(self, max_entries=1024, max_bytes=None, ttl=None, store=None):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.store = store
+        # key -> (value, size, expires_at)
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls, prefix="RESULT_CACHE", store=None):
+        """Build a cache from <prefix>_MAX_ENTRIES / _MAX_BYTES / _TTL."""
+        return cls(
+            max_entries=env_int(f"{prefix}_MAX_ENTRIES", 1024),
+            max_bytes=env_int(f"{prefix}_MAX_BYTES"),
+            ttl=env_float(f"{prefix}_TTL"),
+            store=store,
+        )
+
+    def get(self, key):
+        """Return the cached value, or None on a miss."""
+        value = self._get(key)
+        if value is None and self.store is not None and key[0] in PERSISTED:
+            value = self.store.get(key)
+            if value is not None:
+                self._put(key, value)
+        return value
+
+    def _get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            value, size, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        self._put(key, value)
+        if self.store is not None and key[0] in PERSISTED:
+            self.store.put(key, value)
+
+    def _put(self, key, value):
+        size = _approx_size(key) + _approx_size(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, size, expires_at)
+            self._bytes += size
+            while len(self._data) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        store = self.store.stats() if self.store is not None else None
+        with self._lock:
+            lookups = self.hits + self.misses
+            return dict(
+                entries=len(self._data),
+                bytes=self._bytes,
+                max_entries=self.max_entries,
+                max_bytes=self.max_bytes,
+                ttl=self.ttl,
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                expirations=self.expirations,
+                hit_rate=(self.hits / lookups) if lookups else 0.0,
+                store=store,
+            )
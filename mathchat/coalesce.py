@@ -0,0 +1,84 @@
+import threading
+from .env import env_float
+
+# -------------------
+# Single-flight request coalescing
+#
+# Concurrent callers computing the same key share one computation: the
+# first becomes the leader and runs it, the rest wait for its result.  A
+# leader that fails (or is abandoned, e.g. a closed stream) hands its
+# followers None and they compute for themselves, so a follower is never
+# worse off than without coalescing.  So does a leader that takes longer
+# than the followers' timeout: a streaming leader is paced by its client,
+# and one stalled client must not hold up everyone else.  Nothing is kept
+# after the leader finishes; the result cache covers later requests.
+# -------------------
+
+class _Call:
+    __slots__ = ("done", "result", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.followers = 0
+
+class SingleFlight:
+    def __init__(self, timeout=30.0):
+        # seconds a follower waits by default before computing for itself
+        self.timeout = timeout
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+        self.timeouts = 0
+
+    @classmethod
+    def from_env(cls):
+        """Configured from COALESCE_WAIT_TIMEOUT (seconds, default 30)."""
+        return cls(timeout=env_float("COALESCE_WAIT_TIMEOUT", 30.0))
+
+    def join(self, key):
+        """Return (call, leader).  The leader must call leave(); the others wait()."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                return call, True
+            call.followers += 1
+            self.followers += 1
+            return call, False
+
+    def wait(self, call, timeout=None):
+        """The leader's result, or None if it gave none or did not finish
+        within timeout (default self.timeout) seconds."""
+        if not call.done.wait(self.timeout if timeout is None else timeout):
+            with self._lock:
+                self.timeouts += 1
+            return None
+        return call.result
+
+    def leave(self, key, call, result=None):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.result = result
+        call.done.set()
+
+    def run(self, key, fn, *args):
+        """fn(*args), computed once for all concurrent callers with the same key."""
+        call, leader = self.join(key)
+        if not leader:
+            result = self.wait(call)
+            return fn(*args) if result is None else result
+        result = None
+        try:
+            result = fn(*args)
+        finally:
+            self.leave(key, call, result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return dict(in_flight=len(self._calls), leaders=self.leaders, followers=self.followers,
+                        timeouts=self.timeouts)
@@ -0,0 +1,105 @@
+import base64
+import struct
+from .steps import strip_srepr
+
+try:
+    import msgpack
+except ImportError:  # optional: the built-in encoder below writes the same bytes, more slowly
+    msgpack = None
+
+# -------------------
+# Compact response format
+#
+# Machine clients can ask for MessagePack (Accept: application/msgpack).
+# The body has the same keys as the JSON one, but the steps are the
+# engines' step records (see mathchat.steps) instead of sentences, and
+# /evaluate's data is sent as raw bytes instead of base64.
+#
+# With "srepr": false in the request, the "Original equation" step (SymPy's
+# srepr of both sides, often the largest part of a /solve response) is left
+# out, in either format.
+# -------------------
+
+MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+def compact_body(kind, body, srepr=True):
+    """The MessagePack form of an engine's response body (never modifies it)."""
+    if not srepr:
+        body = strip_srepr(body)
+    if kind == "evaluate" and "data" in body:
+        return dict(body, data=base64.b64decode(body["data"]))
+    return body
+
+# ------------------- MessagePack -------------------
+
+# smallest first, as msgpack picks them
+_INTS = tuple((bytes((marker,)), fmt, -(1 << bits - 1) if signed else 0, 1 << bits - 1 if signed else 1 << bits)
+              for marker, fmt, bits, signed in ((0xcc, ">B", 8, False), (0xd0, ">b", 8, True),
+                                                (0xcd, ">H", 16, False), (0xd1, ">h", 16, True),
+                                                (0xce, ">I", 32, False), (0xd2, ">i", 32, True),
+                                                (0xcf, ">Q", 64, False), (0xd3, ">q", 64, True)))
+
+_U8, _U16, _U32 = struct.Struct(">B"), struct.Struct(">H"), struct.Struct(">I")
+_DOUBLE = struct.Struct(">d")
+_STR = (b"\xd9", b"\xda", b"\xdb")
+_BIN = (b"\xc4", b"\xc5", b"\xc6")
+_ARRAY = (None, b"\xdc", b"\xdd")
+_MAP = (None, b"\xde", b"\xdf")
+
+def _length(out, n, small, small_limit, markers):
+    # a length in the header: fixed-size form, then 8 (str/bin only), 16 or 32 bits
+    if n < small_limit:
+        out.append(small | n)
+    elif markers[0] is not None and n < 1 << 8:
+        out += markers[0] + _U8.pack(n)
+    elif n < 1 << 16:
+        out += markers[1] + _U16.pack(n)
+    else:
+        out += markers[2] + _U32.pack(n)
+
+def _pack(obj, out):
+    # strings first: step records are almost all strings
+    kind = type(obj)
+    if kind is str:
+        data = obj.encode("utf-8")
+        _length(out, len(data), 0xa0, 32, _STR)
+        out += data
+    elif kind is list or kind is tuple:
+        _length(out, len(obj), 0x90, 16, _ARRAY)
+        for item in obj:
+            _pack(item, out)
+    elif kind is dict:
+        _length(out, len(obj), 0x80, 16, _MAP)
+        for key, value in obj.items():
+            _pack(key, out)
+            _pack(value, out)
+    elif obj is None:
+        out.append(0xc0)
+    elif kind is bool:
+        out.append(0xc3 if obj else 0xc2)
+    elif kind is int:
+        if 0 <= obj < 0x80:
+            out.append(obj)
+        elif -0x20 <= obj < 0:
+            out.append(obj & 0xff)
+        else:
+            for marker, fmt, low, high in _INTS:
+                if low <= obj < high:
+                    out += marker + struct.pack(fmt, obj)
+                    return
+            raise OverflowError("integer out of MessagePack's range")
+    elif kind is float:
+        out += b"\xcb" + _DOUBLE.pack(obj)
+    elif kind is bytes or kind is bytearray:
+        _length(out, len(obj), None, 0, _BIN)
+        out += obj
+    else:
+        raise TypeError(f"cannot pack {kind.__name__}")
+
+def packb(obj):
+    """MessagePack bytes for a response body."""
+    if msgpack is not None:
+        return msgpack.packb(obj, use_bin_type=True)
+    out = bytearray()
+    _pack(obj, out)
+    return bytes(out)
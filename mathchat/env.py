@@ -0,0 +1,19 @@
+import os
+
+# -------------------
+# Numeric settings from the environment
+#
+# Every limit and size in the package is an environment variable read at
+# import or in a from_env() constructor.  An unset or blank variable means
+# the default; anything else must parse as a number.
+# -------------------
+
+def env_int(name, default=None):
+    """The variable as an int, or default if it is unset or blank."""
+    raw = os.environ.get(name)
+    return default if raw is None or raw.strip() == "" else int(raw)
+
+def env_float(name, default=None):
+    """The variable as a float, or default if it is unset or blank."""
+    raw = os.environ.get(name)
+    return default if raw is None or raw.strip() == "" else float(raw)
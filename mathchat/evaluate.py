@@ -0,0 +1,168 @@
+import base64
+from ._sympy import sp
+from . import admission
+from .env import env_int
+from .metrics import stopwatch
+from .parsing import normalize
+from .simplify import parse_expr, simplify_expression
+
+# -------------------
+# Numeric evaluation over many points
+#
+# The (by default simplified) expression is compiled once with lambdify into
+# a NumPy function and applied to whole arrays.  Compiled functions are kept
+# in a ResultCache keyed on the srepr of the compiled expression and the
+# argument names, with a second key on the input text so repeated requests
+# skip parsing too.  Values go in and out as base64-encoded little-endian
+# buffers; inputs may also be JSON lists or linspace specs.
+# -------------------
+
+MAX_POINTS = env_int("EVALUATE_MAX_POINTS", 4_000_000)
+
+def _numpy():
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+    return np
+
+def _decode_values(np, spec):
+    # [1, 2, 3] | {"start", "stop", "num"} | {"base64", "dtype": "float64"}
+    if isinstance(spec, list):
+        return np.array(spec, dtype=np.float64)
+    if isinstance(spec, dict) and "base64" in spec:
+        if spec.get("dtype", "float64") != "float64":
+            raise ValueError("only float64 buffers are supported")
+        raw = base64.b64decode(spec["base64"], validate=True)
+        if len(raw) % 8:
+            raise ValueError("buffer length is not a multiple of 8 bytes")
+        return np.frombuffer(raw, dtype="<f8")
+    if isinstance(spec, dict) and "num" in spec:
+        num = int(spec["num"])
+        if not 0 < num <= MAX_POINTS:
+            raise ValueError(f"num must be between 1 and {MAX_POINTS}")
+        return np.linspace(float(spec.get("start", 0)), float(spec.get("stop", 1)), num)
+    raise ValueError("give a list of numbers, {start, stop, num} or {base64}")
+
+def _target(expr_str, simplify, cache, pool, flights):
+    # the expression to compile: the /simplify result or the parsed input
+    if simplify:
+        body, code = simplify_expression(expr_str, cache=cache, pool=pool, flights=flights)
+        if body["status"] == "error":
+            return None, (body, code)
+        return sp.sympify(body["result"]), None
+    expr_clean, tokens = normalize(expr_str)
+    error = admission.check(expr_clean, tokens)[1]
+    if error is not None:
+        return None, (dict(status="error", message=error), 400)
+    try:
+        return parse_expr(expr_clean, tokens), None
+    except Exception as e:
+        return None, (dict(status="error", message=f"Invalid expression ({str(e)})"), 400)
+
+def _compile(expr_str, names, simplify, cache, compiled, pool, flights):
+    """Return (expression, numpy function) or (None, error_response)."""
+    text_key = ("evaluate", normalize(expr_str)[0], names, simplify)
+    if compiled is not None:
+        hit = compiled.get(text_key)
+        if hit is not None:
+            return hit, None
+    target, error = _target(expr_str, simplify, cache, pool, flights)
+    if error is not None:
+        return None, error
+    missing = sorted(s.name for s in target.free_symbols if s.name not in names)
+    if missing:
+        return None, (dict(status="error", message=f"No values given for {', '.join(missing)}."), 400)
+    struct_key = ("lambdify", sp.srepr(target), names)
+    entry = compiled.get(struct_key) if compiled is not None else None
+    if entry is None:
+        fn = sp.lambdify([sp.Symbol(n) for n in names], target, modules="numpy")
+        entry = (str(target), fn)
+        if compiled is not None:
+            compiled.put(struct_key, entry)
+    if compiled is not None:
+        compiled.put(text_key, entry)
+    return entry, None
+
+def evaluate_expression(expr_str, variables, mode="zip", simplify=True, cache=None, compiled=None, pool=None,
+                        flights=None):
+    """Evaluate an expression over arrays of values; returns (response_dict, http_status).
+
+    variables maps each name to its values.  In "zip" mode the arrays are
+    broadcast against each other (point i uses element i of every array);
+    in "grid" mode every combination is evaluated, one axis per variable in
+    the order given.  The result is a float64 (or complex128) buffer in
+    C order, base64-encoded, with its shape.  simplify runs the expression
+    through simplify_expression first, with the given StagePool and
+    SingleFlight.
+    """
+    np = _numpy()
+    if np is None:
+        return dict(status="error", message="Evaluation needs NumPy, which is not installed."), 501
+    expr_str = (expr_str or "").strip()
+    if not expr_str:
+        return dict(status="error", message="Empty expression"), 400
+    if not isinstance(variables, dict):
+        return dict(status="error", message="Provide the values as \"variables\": {name: values}."), 400
+    if mode not in ("zip", "grid"):
+        return dict(status="error", message="mode must be \"zip\" or \"grid\"."), 400
+
+    mark = stopwatch()
+    names = tuple(variables)
+    arrays = []
+    for name, spec in variables.items():
+        if not name.isidentifier():
+            return dict(status="error", message=f"Invalid variable name: {name!r}"), 400
+        try:
+            arrays.append(_decode_values(np, spec))
+        except (ValueError, TypeError) as e:
+            return dict(status="error", message=f"Bad values for {name} ({e})"), 400
+
+    if mode == "grid":
+        count = 1
+        for a in arrays:
+            count *= a.size
+        if count > MAX_POINTS:
+            return dict(status="error", message=f"Too many points ({count}, limit is {MAX_POINTS})."), 400
+        arrays = np.meshgrid(*arrays, indexing="ij") if arrays else []
+    else:
+        try:
+            arrays = np.broadcast_arrays(*arrays) if arrays else []
+        except ValueError:
+            return dict(status="error", message="In zip mode all value arrays must have the same length."), 400
+        if arrays and arrays[0].size > MAX_POINTS:
+            return dict(status="error", message=f"Too many points ({arrays[0].size}, limit is {MAX_POINTS})."), 400
+    shape = arrays[0].shape if arrays else ()
+    mark("decode")
+
+    entry, error = _compile(expr_str, names, simplify, cache, compiled, pool, flights)
+    if error is not None:
+        return error
+    text, fn = entry
+    mark("compile")
+
+    with np.errstate(all="ignore"):
+        try:
+            values = np.asarray(fn(*arrays))
+        except Exception as e:
+            return dict(status="error", message=f"Could not evaluate ({e.__class__.__name__}: {e})"), 400
+    mark("evaluate")
+    # constant expressions come back as scalars
+    values = np.broadcast_to(values, shape)
+    if np.iscomplexobj(values):
+        if np.all(values.imag == 0):
+            values = values.real
+        dtype = "complex128" if np.iscomplexobj(values) else "float64"
+    else:
+        dtype = "float64"
+    values = np.ascontiguousarray(values, dtype="<c16" if dtype == "complex128" else "<f8")
+    data = base64.b64encode(values.tobytes()).decode("ascii")
+    mark("encode")
+    return dict(
+        status="ok",
+        expression=text,
+        variables=list(names),
+        shape=list(shape),
+        dtype=dtype,
+        data=data,
+    ), 200
@@ -0,0 +1,110 @@
+from ._sympy import sp
+from .env import env_int
+from . import strategy
+
+# -------------------
+# Factor stage for expanded polynomials
+#
+# sp.factor goes straight to full factorization, which on a large
+# multivariate polynomial can take seconds only to find that it does not
+# factor.  factor() takes a polynomial with integer or rational
+# coefficients apart cheaply first:
+#   1. content and monomial GCD (2*x**2*y + 4*x -> 2*x*(x*y + 2))
+#   2. square-free decomposition
+#   3. for each square-free part, a proof that it is irreducible where one
+#      is cheap: linear in some variable and primitive in it, or irreducible
+#      after substituting integers for all but one variable (with that
+#      variable's degree unchanged, a factorization would survive it)
+# Only parts that are not proven irreducible go to full factorization,
+# and only while terms * total degree stays within FACTOR_BUDGET; larger
+# ones are left as they are.  Results are put together as sp.factor does,
+# so wherever full factorization runs the output is the same.  Anything
+# that is not such a polynomial goes to sp.factor unchanged.
+# -------------------
+
+FACTOR_BUDGET = env_int("FACTOR_BUDGET", 20000)
+
+# values substituted for the other variables in the irreducibility test
+_POINTS = ((2, 3, 5, 7, 11, 13, 17, 19), (3, 7, 13, 19, 29, 37, 43, 53))
+
+def _as_poly(expr):
+    # an expanded polynomial over ZZ/QQ, or None
+    if not expr.is_Add or strategy.classify(expr)[0] != "polynomial":
+        return None
+    try:
+        poly = sp.Poly(expr)
+    except sp.PolynomialError:
+        return None
+    if not (poly.domain.is_ZZ or poly.domain.is_QQ):
+        return None
+    return poly
+
+def _primitive_in(poly, gen):
+    # content of poly as a polynomial in gen over ZZ[other gens] is 1: the
+    # gcd of its coefficients, smallest first, stopping once it is constant
+    i = poly.gens.index(gen)
+    others = poly.gens[:i] + poly.gens[i + 1:]
+    coefficients = {}
+    for monom, c in poly.terms():
+        coefficients.setdefault(monom[i], {})[monom[:i] + monom[i + 1:]] = c
+    content = None
+    for terms in sorted(coefficients.values(), key=len):
+        c = sp.Poly.from_dict(terms, *others, domain=poly.domain)
+        content = c if content is None else content.gcd(c)
+        if content.is_ground:
+            return abs(content.LC()) == 1
+    return False
+
+def _irreducible(poly):
+    """True if poly (primitive, square-free) is proven irreducible cheaply."""
+    degrees = poly.degree_list()
+    if sum(degrees) <= 1:
+        return True
+    if len(poly.gens) == 1:
+        return False
+    # the variable of smallest positive degree keeps the test cheapest
+    i = min((i for i, d in enumerate(degrees) if d > 0), key=lambda i: degrees[i])
+    gen = poly.gens[i]
+    if degrees[i] == 1:
+        return _primitive_in(poly, gen)
+    others = [g for g in poly.gens if g != gen]
+    for values in _POINTS:
+        image = poly.eval(dict(zip(others, values)))
+        if image.degree(gen) != degrees[i]:
+            continue
+        if image.is_irreducible:
+            return _primitive_in(poly, gen)
+    return False
+
+def factor_list(poly):
+    """(coeff, [(Poly, multiplicity)]) for a Poly over ZZ/QQ; see the module notes."""
+    denominator, poly = poly.clear_denoms(convert=True)
+    coeff, poly = poly.primitive()
+    if poly.LC() < 0:
+        coeff, poly = -coeff, -poly
+    coeff = sp.Rational(coeff) / denominator
+    monomial, poly = poly.terms_gcd()
+    factors = [(sp.Poly(gen, *poly.gens), k) for gen, k in zip(poly.gens, monomial) if k]
+    sqf_coeff, parts = poly.sqf_list()
+    coeff *= sqf_coeff
+    for part, k in parts:
+        if part.is_ground:
+            continue
+        if _irreducible(part) or len(part.terms()) * part.total_degree() > FACTOR_BUDGET:
+            if part.LC() < 0:
+                part = -part
+                coeff *= (-1) ** k
+            factors.append((part, k))
+            continue
+        part_coeff, irreducible = part.factor_list()
+        coeff *= sp.Integer(part_coeff) ** k
+        factors.extend((f, k * m) for f, m in irreducible)
+    return coeff, factors
+
+def factor(expr):
+    """sp.factor, taking expanded ZZ/QQ polynomials apart cheaply first."""
+    poly = _as_poly(expr)
+    if poly is None:
+        return sp.factor(expr)
+    coeff, factors = factor_list(poly)
+    return sp.core.mul._keep_coeff(coeff, sp.Mul(*[f.as_expr() ** k for f, k in factors]))
@@ -0,0 +1,507 @@
+from collections import namedtuple
+from fractions import Fraction
+import re
+from ._sympy import sp
+from . import admission
+from .metrics import stopwatch
+from .parsing import Unsupported, normalize, parse, parse_sympy
+from .steps import step
+
+# -------------------
+# Linear equation engine
+#
+# Numeric one-unknown equations (the bulk of /solve traffic) are parsed into
+# exact (coefficient, constant) pairs and solved with Fraction arithmetic.
+# Anything the linear builder does not accept (symbolic coefficients,
+# functions, floats, non-linear terms, ...) is handed to the SymPy path, so
+# both paths produce the same steps and the same error messages.
+# -------------------
+
+# keep exact exponentiation cheap; bigger powers go to SymPy
+_MAX_EXPONENT = 1000
+
+# ------------------- Linear forms -------------------
+# A linear form is (terms, const): terms maps variable name -> Fraction and
+# never holds zero coefficients, const is a Fraction.
+
+def _add(a, b, sign=1):
+    terms = dict(a[0])
+    for name, c in b[0].items():
+        c = terms.get(name, 0) + sign * c
+        if c:
+            terms[name] = c
+        else:
+            terms.pop(name, None)
+    return terms, a[1] + sign * b[1]
+
+def _scale(a, k):
+    if not k:
+        return {}, Fraction(0)
+    return {name: c * k for name, c in a[0].items()}, a[1] * k
+
+def _mul(a, b):
+    if not a[0]:
+        return _scale(b, a[1])
+    if not b[0]:
+        return _scale(a, b[1])
+    raise Unsupported("non-linear product")
+
+def _div(a, b):
+    if b[0] or not b[1]:
+        raise Unsupported("division by a variable or by zero")
+    return _scale(a, 1 / b[1])
+
+def _pow(base, exp):
+    if exp[0] or exp[1].denominator != 1:
+        raise Unsupported("non-integer exponent")
+    n = exp[1].numerator
+    if base[0]:
+        # sympify folds x**0 to 1 and x**1 to x; higher powers are non-linear
+        if n == 0:
+            return {}, Fraction(1)
+        if n == 1:
+            return base
+        raise Unsupported("non-linear power")
+    value = base[1]
+    if abs(n) > _MAX_EXPONENT and abs(value) != 1 and value != 0:
+        raise Unsupported("exponent too large")
+    if value == 0 and n < 0:
+        raise Unsupported("division by zero")
+    return {}, value ** n
+
+class _LinearBuilder:
+    # parse() builder producing linear forms
+
+    def number(self, text):
+        if '.' in text:
+            raise Unsupported("decimal")
+        return {}, Fraction(int(text))
+
+    def name(self, text):
+        return {text: Fraction(1)}, Fraction(0)
+
+    def add(self, a, b):
+        return _add(a, b)
+
+    def sub(self, a, b):
+        return _add(a, b, -1)
+
+    def mul(self, a, b):
+        return _mul(a, b)
+
+    def div(self, a, b):
+        return _div(a, b)
+
+    def pow(self, a, b):
+        return _pow(a, b)
+
+    def neg(self, a):
+        return _scale(a, -1)
+
+LINEAR = _LinearBuilder()
+
+# sympify canonicalises every linear input to coeff*var + const, so the
+# original/rewritten sides can be printed straight from the linear form.
+# These mirror SymPy's str() and srepr() output for that shape.
+
+def format_term(c, name):
+    sign = '-' if c < 0 else ''
+    c = abs(c)
+    if c.denominator == 1:
+        return f"{sign}{name}" if c == 1 else f"{sign}{c.numerator}*{name}"
+    if c.numerator == 1:
+        return f"{sign}{name}/{c.denominator}"
+    return f"{sign}{c.numerator}*{name}/{c.denominator}"
+
+def _srepr_number(c):
+    if c.denominator == 1:
+        return f"Integer({c.numerator})"
+    return f"Rational({c.numerator}, {c.denominator})"
+
+def _srepr_term(c, name):
+    sym = f"Symbol('{name}')"
+    if c == 1:
+        return sym
+    if c == -1:
+        return f"Mul(Integer(-1), {sym})"
+    if c < 0:
+        return f"Mul(Integer(-1), {_srepr_number(-c)}, {sym})"
+    return f"Mul({_srepr_number(c)}, {sym})"
+
+def _ordered(coeff, const):
+    # SymPy prints a positive constant before a negative variable term
+    return coeff < 0 < const
+
+def format_linear(coeff, const, name):
+    if not coeff:
+        return str(const)
+    term = format_term(coeff, name)
+    if not const:
+        return term
+    if _ordered(coeff, const):
+        return f"{const} - {term[1:]}"
+    return f"{term} - {-const}" if const < 0 else f"{term} + {const}"
+
+def srepr_linear(coeff, const, name):
+    if not coeff:
+        return _srepr_number(const)
+    term = _srepr_term(coeff, name)
+    if not const:
+        return term
+    if _ordered(coeff, const):
+        return f"Add({_srepr_number(const)}, {term})"
+    return f"Add({term}, {_srepr_number(const)})"
+
+# ------------------- Solving -------------------
+
+def _solve_fast(lhs, rhs):
+    names = set(lhs[0]) | set(rhs[0])
+    # no surviving variable or several of them: let SymPy produce the exact error
+    if len(names) != 1:
+        raise Unsupported("not a single unknown")
+    var = names.pop()
+
+    left_coeff = lhs[0].get(var, Fraction(0))
+    right_coeff = rhs[0].get(var, Fraction(0))
+    left_const = lhs[1]
+    right_const = rhs[1]
+    new_coeff = left_coeff - right_coeff
+    rhs_after = right_const - left_const
+    if new_coeff == 0:
+        return degenerate(rhs_after == 0)
+
+    solution = rhs_after / new_coeff
+    steps = linear_steps(var, left_coeff, left_const, right_coeff, right_const, new_coeff, rhs_after, solution)
+    return dict(status="ok", steps=steps, solution=f"{var} = {solution}"), 200
+
+# distinct printed sides kept per memo (one per template request)
+_SIDE_MEMO_SIZE = 65536
+
+def _side_texts(coeff, const, var, memo):
+    if memo is None:
+        return srepr_linear(coeff, const, var), format_linear(coeff, const, var)
+    texts = memo.get((coeff, const))
+    if texts is None:
+        texts = srepr_linear(coeff, const, var), format_linear(coeff, const, var)
+        if len(memo) < _SIDE_MEMO_SIZE:
+            memo[coeff, const] = texts
+    return texts
+
+def linear_steps(var, left_coeff, left_const, right_coeff, right_const, new_coeff, rhs_after, solution,
+                 memo=None):
+    """The fast path's step records from its exact numbers (Fractions, or
+    ints for whole numbers: both print and compare the same).  memo keeps
+    the printed sides of a template's instances, which repeat a lot."""
+    left_srepr, left_text = _side_texts(left_coeff, left_const, var, memo)
+    right_srepr, right_text = _side_texts(right_coeff, right_const, var, memo)
+    # the records spelled out, each number printed once: a template request
+    # builds these for every instance
+    left_coeff, right_coeff, new_coeff = str(left_coeff), str(right_coeff), str(new_coeff)
+    left_const, right_const, rhs_after = str(left_const), str(right_const), str(rhs_after)
+    return [
+        ["original", [left_srepr, right_srepr], None],
+        ["rewrite", [left_text, right_text], None],
+        ["collect", [right_coeff, var], None],
+        ["combine", [left_coeff, right_coeff, var], new_coeff],
+        ["moved", [new_coeff, var, left_const, right_const], None],
+        ["move_constants", [left_const], None],
+        ["result", [new_coeff, var], rhs_after],
+        ["divide", [rhs_after, new_coeff, var], None],
+        ["simplify", [var], str(solution)],
+    ]
+
+def no_variable():
+    """The response for an equation with no unknown."""
+    return dict(status="error", message="No variable detected. Use a single letter variable (e.g. x)."), 400
+
+def degenerate(identity):
+    """The response when the unknown's coefficient cancels."""
+    if identity:
+        return dict(status="error", message="Infinite solutions (identity). Every value of the variable satisfies the equation."), 200
+    return dict(status="error", message="No solution (contradiction). The equation is inconsistent."), 200
+
+def sympify_side(text, tokens):
+    """One side as a SymPy expression, from its tokens where the parser takes them."""
+    if tokens is not None:
+        try:
+            return parse_sympy(tokens)
+        except Unsupported:
+            pass
+    return sp.sympify(text)
+
+def _rational_poly(expr, var):
+    # Poly over ZZ/QQ when expr is a polynomial in var with rational
+    # coefficients; None sends the caller down the generic SymPy path
+    if expr.has(sp.Float):
+        return None
+    try:
+        return sp.Poly(expr, var, domain=sp.QQ, expand=False)
+    except (sp.PolynomialError, sp.polys.polyerrors.CoercionFailed):
+        return None
+
+def _simplify(value):
+    # sp.simplify returns numbers unchanged; skip the call for them
+    return value if value.is_Number else sp.simplify(value)
+
+def _solve_sympy(eqn, cache=None):
+    mark = stopwatch()
+    try:
+        lhs = sympify_side(eqn.lhs, eqn.lhs_tokens)
+        rhs = sympify_side(eqn.rhs, eqn.rhs_tokens)
+    except Exception as e:
+        return dict(status="error", message=f"Could not parse expression. Try simpler input. ({str(e)})"), 400
+    mark("sympify")
+    if cache is None:
+        return _solve_parsed(lhs, rhs, eqn.hint)
+
+    # the SymPy path is the expensive one, so its results also get a
+    # structural key (persisted when the cache has a disk store)
+    key = ("solve-srepr", sp.srepr(lhs), sp.srepr(rhs))
+    result = cache.get(key)
+    mark("cache")
+    if result is None:
+        result = _solve_parsed(lhs, rhs, eqn.hint)
+        cache.put(key, result)
+    return result
+
+def _solve_parsed(lhs, rhs, user_var_hint):
+    mark = stopwatch()
+    syms = list(lhs.free_symbols.union(rhs.free_symbols))
+
+    if len(syms) == 0:
+        return no_variable()
+
+    # choose variable: prefer the user first-letter if present
+    var = None
+    if user_var_hint:
+        for s in syms:
+            if s.name == user_var_hint:
+                var = s
+                break
+    if var is None:
+        # fallback: pick the single symbol if only one, else pick first (but will error later if more than one)
+        var = syms[0]
+
+    if len(syms) > 1:
+        names = ', '.join([str(s) for s in syms])
+        return dict(status="error", message=f"Multiple variables detected ({names}). This solver supports one unknown."), 400
+
+    # expand once; everything below works on the expanded sides
+    expr_l = sp.expand(lhs)
+    expr_r = sp.expand(rhs)
+
+    poly_l = _rational_poly(expr_l, var)
+    poly_r = _rational_poly(expr_r, var) if poly_l is not None else None
+
+    # check degree (we only support linear)
+    if poly_r is not None:
+        deg = (poly_l - poly_r).degree()
+    else:
+        deg = sp.degree(sp.expand(expr_l - expr_r), var)
+    if deg is None:
+        deg = 0
+    if deg > 1:
+        return dict(status="error", message="Non-linear equation detected (degree > 1). This solver supports linear equations only."), 400
+    mark("degree")
+
+    # coefficients
+    if poly_r is not None:
+        terms_l = poly_l.as_dict()
+        terms_r = poly_r.as_dict()
+        left_coeff = terms_l.get((1,), sp.S.Zero)
+        right_coeff = terms_r.get((1,), sp.S.Zero)
+        left_const = terms_l.get((0,), sp.S.Zero)
+        right_const = terms_r.get((0,), sp.S.Zero)
+    else:
+        left_coeff = expr_l.coeff(var, 1)
+        right_coeff = expr_r.coeff(var, 1)
+        left_const = expr_l.subs(var, 0)
+        right_const = expr_r.subs(var, 0)
+    mark("coefficients")
+
+    # Step records (rendered as sentences by mathchat.steps)
+    steps = []
+
+    # Step 1: show original (pretty)
+    steps.append(step("original", sp.srepr(lhs), sp.srepr(rhs)))
+    # but give prettier human readable:
+    steps.append(step("rewrite", expr_l, expr_r))
+
+    # Step 2: collect variable terms to left
+    steps.append(step("collect", right_coeff, var))
+    new_coeff = _simplify(left_coeff - right_coeff)
+    steps.append(step("combine", left_coeff, right_coeff, var, result=new_coeff))
+    # equation now: new_coeff*var + left_const = right_const
+    steps.append(step("moved", new_coeff, var, left_const, right_const))
+
+    # Step 3: move constants to right
+    steps.append(step("move_constants", left_const))
+    rhs_after = _simplify(right_const - left_const)
+    steps.append(step("result", new_coeff, var, result=rhs_after))
+
+    # Solve for variable
+    if _simplify(new_coeff) == 0:
+        # either infinite solutions or no solution
+        result = degenerate(_simplify(rhs_after) == 0)
+        mark("steps")
+        return result
+
+    solution_expr = _simplify(sp.Rational(1,1) * rhs_after / new_coeff)
+    solution_pretty = f"{var} = {solution_expr}"
+
+    # final arithmetic step
+    steps.append(step("divide", rhs_after, new_coeff, var))
+    steps.append(step("simplify", var, result=solution_expr))
+    mark("steps")
+
+    return dict(status="ok", steps=steps, solution=str(solution_pretty)), 200
+
+# lhs/rhs are the preprocessed side texts (cache keys and the sympify
+# fallback); the token lists are None for sides the tokenizer rejects
+Equation = namedtuple("Equation", "lhs rhs hint lhs_tokens rhs_tokens")
+
+def split_equation(eq):
+    """Validate a raw equation; returns (error_response, None) or (None, Equation)."""
+    eq = (eq or "").strip()
+    if not eq:
+        return (dict(status="error", message="Empty equation."), 400), None
+
+    # must have exactly one '='
+    if eq.count('=') != 1:
+        return (dict(status="error", message="Please provide a single '=' separating left and right sides."), 400), None
+
+    left_str, right_str = eq.split('=', 1)
+
+    # try to identify a variable letter from the raw input (first alphabetic character)
+    m = re.search(r'[A-Za-z]', eq)
+    user_var_hint = m.group(0) if m else None
+
+    lhs_s, lhs_tokens = normalize(left_str, implicit_mul=True)
+    rhs_s, rhs_tokens = normalize(right_str, implicit_mul=True)
+    # rejects inputs sympify or expand would choke on, before any of it runs
+    for text, tokens in ((lhs_s, lhs_tokens), (rhs_s, rhs_tokens)):
+        error = admission.check(text, tokens)[1]
+        if error is not None:
+            return (dict(status="error", message=error), 400), None
+    return None, Equation(lhs_s, rhs_s, user_var_hint, lhs_tokens, rhs_tokens)
+
+def _cache_key(eqn):
+    return ("solve", eqn.lhs, eqn.rhs)
+
+def solve_key(eq):
+    """The normalized key of an equation string, or None if it is invalid."""
+    error, eqn = split_equation(eq)
+    return None if error is not None else _cache_key(eqn)
+
+def _parse_side(text, tokens, memo):
+    # memo maps side text -> linear form or the Unsupported it raised, so a
+    # batch parses each distinct side (e.g. a shared "0") only once
+    if tokens is None:
+        raise Unsupported("not tokenizable")
+    if memo is None:
+        return parse(tokens, LINEAR)
+    form = memo.get(text)
+    if form is None:
+        try:
+            form = parse(tokens, LINEAR)
+        except Unsupported as e:
+            form = e
+        memo[text] = form
+    if isinstance(form, Unsupported):
+        raise form
+    return form
+
+def _solve(eqn, memo=None, cache=None):
+    mark = stopwatch()
+    try:
+        lhs = _parse_side(eqn.lhs, eqn.lhs_tokens, memo)
+        rhs = _parse_side(eqn.rhs, eqn.rhs_tokens, memo)
+        mark("parse")
+        result = _solve_fast(lhs, rhs)
+    except Unsupported:
+        # counts the rejected fast-path attempt
+        mark("parse")
+        return _solve_sympy(eqn, cache)
+    mark("steps")
+    return result
+
+def solve_equation(eq, cache=None, flights=None):
+    """Solve one equation string; returns (response_dict, http_status).
+
+    With a ResultCache, results are keyed on the preprocessed sides.  The
+    variable hint is left out of the key: it only matters when several
+    symbols are present, and that is rejected whichever one is picked.
+    Parsing into the canonical structure is cheaper than a srepr on the fast
+    path, so only equations that need SymPy also get a structural key.
+    With a SingleFlight, concurrent misses on the same key are solved once.
+    """
+    mark = stopwatch()
+    error, eqn = split_equation(eq)
+    mark("preprocess")
+    if error is not None:
+        return error
+    if cache is None:
+        return _solve(eqn)
+
+    key = _cache_key(eqn)
+    result = cache.get(key)
+    mark("cache")
+    if result is None:
+        if flights is None:
+            result = _solve(eqn, cache=cache)
+        else:
+            result = flights.run(key, _solve, eqn, None, cache)
+        cache.put(key, result)
+    return result
+
+# ------------------- Batches -------------------
+
+# below this many distinct equations a batch is solved in-process
+PARALLEL_THRESHOLD = 512
+CHUNK_SIZE = 256
+
+def _solve_chunk(items, cache=None):
+    memo = {}
+    return [_solve(eqn, memo, cache) for eqn in items]
+
+def solve_batch(equations, cache=None, executor=None):
+    """Solve a list of equation strings; returns a list of (response_dict, http_status).
+
+    Identical equations (after preprocessing) are solved once.  When an
+    executor is given and enough distinct equations remain after the cache,
+    they are fanned out to it in chunks.
+    """
+    results = [None] * len(equations)
+    # key -> indexes of the equations sharing it
+    pending = {}
+    for i, eq in enumerate(equations):
+        if not isinstance(eq, str):
+            results[i] = (dict(status="error", message="Equation must be a string."), 400)
+            continue
+        error, eqn = split_equation(eq)
+        if error is not None:
+            results[i] = error
+            continue
+        key = _cache_key(eqn)
+        if key in pending:
+            pending[key][1].append(i)
+            continue
+        hit = cache.get(key) if cache is not None else None
+        if hit is not None:
+            results[i] = hit
+            continue
+        pending[key] = (eqn, [i])
+
+    work = [eqn for eqn, _ in pending.values()]
+    if executor is not None and len(work) >= PARALLEL_THRESHOLD:
+        chunks = [work[i:i + CHUNK_SIZE] for i in range(0, len(work), CHUNK_SIZE)]
+        solved = [r for chunk in executor.map(_solve_chunk, chunks) for r in chunk]
+    else:
+        solved = _solve_chunk(work, cache)
+
+    for (key, (_, indexes)), result in zip(pending.items(), solved):
+        if cache is not None:
+            cache.put(key, result)
+        for i in indexes:
+            results[i] = result
+    return results
@@ -0,0 +1,185 @@
+from contextlib import contextmanager
+import contextvars
+import heapq
+import os
+import threading
+import time
+
+# -------------------
+# Opt-in per-stage latency instrumentation
+#
+# Engine code calls stopwatch() and marks the end of each stage; the marks
+# go to the Timings of the request being served (a context variable set by
+# Metrics.request()).  Outside an instrumented request stopwatch() returns a
+# no-op, so the engines pay nothing when metrics are off.  Finished requests
+# are aggregated into histograms of wall and CPU seconds per stage, rendered
+# in the Prometheus text format.  CPU time is that of the serving thread:
+# work done in worker processes shows up as wall time only.
+# -------------------
+
+# upper bounds in seconds, Prometheus' default buckets plus a finer low end
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+           0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# how many of the slowest requests are kept for /stats
+SLOWEST = 10
+
+_current = contextvars.ContextVar("request_timings", default=None)
+
+class Timings:
+    """Wall and CPU seconds per stage for one request."""
+
+    def __init__(self):
+        self.stages = {}
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time()
+
+    def add(self, stage, wall, cpu):
+        # a stage can run more than once per request (e.g. a rejected fast
+        # path followed by the SymPy one); the times add up
+        prev = self.stages.get(stage)
+        if prev is not None:
+            wall += prev[0]
+            cpu += prev[1]
+        self.stages[stage] = (wall, cpu)
+
+    def elapsed(self):
+        return time.perf_counter() - self.wall, time.thread_time() - self.cpu
+
+    def as_dict(self):
+        """Milliseconds, for the debug field of a response."""
+        wall, cpu = self.elapsed()
+        return dict(
+            wall_ms=round(wall * 1000, 3),
+            cpu_ms=round(cpu * 1000, 3),
+            stages={name: dict(wall_ms=round(w * 1000, 3), cpu_ms=round(c * 1000, 3))
+                    for name, (w, c) in self.stages.items()},
+        )
+
+def _ignore(stage):
+    pass
+
+def stopwatch():
+    """Return mark(stage), which records the time since the previous mark.
+
+    The first mark measures from the stopwatch() call.
+    """
+    timings = _current.get()
+    if timings is None:
+        return _ignore
+    last = [time.perf_counter(), time.thread_time()]
+
+    def mark(stage):
+        wall, cpu = time.perf_counter(), time.thread_time()
+        timings.add(stage, wall - last[0], cpu - last[1])
+        last[0], last[1] = wall, cpu
+    return mark
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+def _labels(pairs):
+    return ",".join(f'{k}="{v}"' for k, v in pairs)
+
+class Metrics:
+    _HELP = {
+        "stage_wall_seconds": "Wall-clock time spent in each pipeline stage.",
+        "stage_cpu_seconds": "CPU time of the serving thread in each pipeline stage.",
+        "request_wall_seconds": "Wall-clock time of instrumented requests.",
+    }
+
+    def __init__(self, enabled=True, buckets=BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        # (metric, ((label, value), ...)) -> Histogram
+        self._series = {}
+        self._slowest = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, prefix="METRICS"):
+        """Metrics switched on by <prefix>_ENABLED=1."""
+        raw = os.environ.get(f"{prefix}_ENABLED") or ""
+        return cls(enabled=raw.strip().lower() in ("1", "true", "yes", "on"))
+
+    @contextmanager
+    def request(self, app, subject=None, debug=False):
+        """Instrument the enclosed request; yields its Timings, or None when
+        metrics are off and no debug timings were asked for.
+
+        subject (the raw input) is kept only for the slowest requests.
+        """
+        if not (self.enabled or debug):
+            yield None
+            return
+        timings = Timings()
+        token = _current.set(timings)
+        try:
+            yield timings
+        finally:
+            _current.reset(token)
+            if self.enabled:
+                self.record(app, timings, subject)
+
+    def record(self, app, timings, subject=None):
+        wall, _ = timings.elapsed()
+        with self._lock:
+            for stage, (w, c) in timings.stages.items():
+                labels = (("app", app), ("stage", stage))
+                self._observe("stage_wall_seconds", labels, w)
+                self._observe("stage_cpu_seconds", labels, c)
+            self._observe("request_wall_seconds", (("app", app),), wall)
+            entry = (wall, app, str(subject)[:200] if subject is not None else None)
+            if len(self._slowest) < SLOWEST:
+                heapq.heappush(self._slowest, entry)
+            elif entry > self._slowest[0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def _observe(self, metric, labels, value):
+        key = (metric, labels)
+        hist = self._series.get(key)
+        if hist is None:
+            hist = self._series[key] = Histogram(self.buckets)
+        hist.observe(value)
+
+    def render(self):
+        """All histograms in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for metric, help_text in self._HELP.items():
+                series = sorted((labels, h) for (m, labels), h in self._series.items() if m == metric)
+                if not series:
+                    continue
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} histogram")
+                for labels, hist in series:
+                    base = _labels(labels)
+                    cumulative = 0
+                    for bound, n in zip(hist.buckets, hist.counts):
+                        cumulative += n
+                        lines.append(f'{metric}_bucket{{{base},le="{bound}"}} {cumulative}')
+                    lines.append(f'{metric}_bucket{{{base},le="+Inf"}} {hist.count}')
+                    lines.append(f"{metric}_sum{{{base}}} {hist.sum!r}")
+                    lines.append(f"{metric}_count{{{base}}} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def stats(self):
+        with self._lock:
+            slowest = sorted(self._slowest, reverse=True)
+        return dict(
+            enabled=self.enabled,
+            slowest=[dict(app=app, wall_ms=round(wall * 1000, 3), input=subject)
+                     for wall, app, subject in slowest],
+        )
@@ -0,0 +1,255 @@
+import builtins
+import keyword
+import re
+import types
+from ._sympy import sp
+
+# -------------------
+# Input normalization shared by /solve and /simplify
+#
+# preprocess_side()/preprocess_expr() are the original regex preprocessors
+# and define what the input grammar means.
+#
+# tokenize() does in one regex scan what preprocess_side()/preprocess_expr()
+# do with a chain of substitutions: unicode minus, ^ for powers and (for
+# /solve) implicit multiplication.  parse() then builds the result directly
+# from the tokens through a builder, either SymPy objects (SYMPY) or the
+# linear forms of mathchat.linear, without sympify's string round trip and
+# eval.  Anything outside the grammar raises Unsupported and callers fall
+# back to preprocess + sympify, which keeps error messages unchanged.
+# -------------------
+
+def preprocess_side(s: str) -> str:
+    if s is None:
+        return s
+    s = s.strip()
+    # unify minus, caret
+    s = s.replace('−', '-')
+    s = s.replace('^', '**')
+    # remove spaces around operators for easier parsing
+    # insert * between number and letter (e.g., 9x -> 9*x)
+    s = re.sub(r'(\d)(\s*)(?=[A-Za-z])', r'\1*', s)
+    # insert * between a letter/number/closing paren and an opening paren (2(x+1) -> 2*(x+1), x(x+1) -> x*(x+1))
+    s = re.sub(r'([A-Za-z0-9\)])\s*\(', r'\1*(', s)
+    # insert * between closing paren and variable/number: (x+1)2 -> (x+1)*2, (x+1)x -> (x+1)*x
+    s = re.sub(r'\)\s*([A-Za-z0-9])', r')*\1', s)
+    # collapse whitespace
+    s = re.sub(r'\s+', '', s)
+    return s
+
+def preprocess_expr(s: str) -> str:
+    s = s.strip()
+    s = s.replace('−', '-')
+    s = s.replace('^', '**')
+    s = re.sub(r'\s+', '', s)
+    return s
+
+class Unsupported(Exception):
+    """Raised when an input has to go through the preprocess + sympify path."""
+
+_TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<num>[0-9]+(?:\.[0-9]+)?)
+  | (?P<name>[A-Za-z][A-Za-z0-9]*)
+  | (?P<op>\*\*|[-+*/()^−])
+""", re.VERBOSE)
+
+# preprocess_side() puts a * after any digit that is followed by a letter,
+# which also splits names such as x2y into x2*y
+_DIGIT_LETTER_RE = re.compile(r'(?<=[0-9])(?=[A-Za-z])')
+
+_OPS = {'^': '**', '−': '-'}
+
+_reserved = None
+
+def _reserved_names():
+    # names sympify does not turn into plain Symbols: everything from
+    # `from sympy import *`, builtin functions and Python keywords
+    global _reserved
+    if _reserved is None:
+        ns = {}
+        exec('from sympy import *', ns)
+        ns.update((name, obj) for name, obj in vars(builtins).items()
+                  if isinstance(obj, types.BuiltinFunctionType))
+        _reserved = frozenset(ns) | frozenset(keyword.kwlist) | frozenset(keyword.softkwlist)
+    return _reserved
+
+def tokenize(text, implicit_mul=False):
+    """Split raw input into (kind, text) tokens, kind being 'num', 'name' or 'op'.
+
+    With implicit_mul the '*' tokens preprocess_side() would insert are
+    added (9x, 2(x+1), (x+1)(x-1), (x+1)x, x2y).
+    """
+    tokens = []
+    pos = 0
+    spaced = False
+    end = len(text)
+    while pos < end:
+        m = _TOKEN_RE.match(text, pos)
+        if not m:
+            raise Unsupported(f"unexpected character {text[pos]!r}")
+        pos = m.end()
+        kind = m.lastgroup
+        value = m.group()
+        if kind == 'ws':
+            spaced = True
+            continue
+        if kind == 'op':
+            value = _OPS.get(value, value)
+        if tokens:
+            prev_kind, prev = tokens[-1]
+            if prev_kind != 'op' and kind != 'op':
+                # two operands in a row: implicit product after a digit,
+                # otherwise the preprocessors would glue them together
+                if not (implicit_mul and prev[-1].isdigit() and value[0].isalpha()):
+                    raise Unsupported("adjacent operands")
+                tokens.append(('op', '*'))
+            elif implicit_mul and value == '(' and (prev_kind != 'op' or prev == ')'):
+                tokens.append(('op', '*'))
+            elif implicit_mul and prev == ')' and kind != 'op':
+                tokens.append(('op', '*'))
+            elif spaced and prev_kind == 'op' and kind == 'op' and prev + value in ('**', '***'):
+                # "* *" would become "**" once spaces are dropped
+                raise Unsupported("split operator")
+        spaced = False
+        if kind == 'name' and implicit_mul:
+            parts = _DIGIT_LETTER_RE.split(value)
+            for i, part in enumerate(parts):
+                if i:
+                    tokens.append(('op', '*'))
+                tokens.append(('name', part))
+            continue
+        if kind == 'num' and len(value) > 1 and value[0] == '0' and value[1] != '.':
+            raise Unsupported("leading zero")
+        tokens.append((kind, value))
+    if not tokens:
+        raise Unsupported("empty input")
+    return tokens
+
+def canonical(tokens):
+    """The text preprocess_side()/preprocess_expr() would produce for these tokens."""
+    return ''.join(value for _, value in tokens)
+
+def normalize(text, implicit_mul=False):
+    """Return (preprocessed text, tokens) for an equation side (implicit_mul)
+    or an expression; tokens is None when the tokenizer rejects the input."""
+    try:
+        tokens = tokenize(text, implicit_mul)
+    except Unsupported:
+        return (preprocess_side if implicit_mul else preprocess_expr)(text), None
+    return canonical(tokens), tokens
+
+class _Parser:
+    # recursive descent with Python's precedence, as sympify evaluates it:
+    #   expr  := term (('+'|'-') term)*
+    #   term  := unary (('*'|'/') unary)*
+    #   unary := ('+'|'-') unary | power
+    #   power := atom ('**' unary)?
+    #   atom  := NUMBER | NAME | '(' expr ')'
+
+    def __init__(self, tokens, builder):
+        self.tokens = tokens
+        self.b = builder
+        self.pos = 0
+
+    def take_op(self, *ops):
+        if self.pos < len(self.tokens):
+            kind, value = self.tokens[self.pos]
+            if kind == 'op' and value in ops:
+                self.pos += 1
+                return value
+        return None
+
+    def parse(self):
+        value = self.expr()
+        if self.pos != len(self.tokens):
+            raise Unsupported("trailing input")
+        return value
+
+    def expr(self):
+        value = self.term()
+        while True:
+            op = self.take_op('+', '-')
+            if op is None:
+                return value
+            rhs = self.term()
+            value = self.b.add(value, rhs) if op == '+' else self.b.sub(value, rhs)
+
+    def term(self):
+        value = self.unary()
+        while True:
+            op = self.take_op('*', '/')
+            if op is None:
+                return value
+            rhs = self.unary()
+            value = self.b.mul(value, rhs) if op == '*' else self.b.div(value, rhs)
+
+    def unary(self):
+        op = self.take_op('+', '-')
+        if op is None:
+            return self.power()
+        value = self.unary()
+        return value if op == '+' else self.b.neg(value)
+
+    def power(self):
+        base = self.atom()
+        if self.take_op('**'):
+            return self.b.pow(base, self.unary())
+        return base
+
+    def atom(self):
+        if self.pos >= len(self.tokens):
+            raise Unsupported("unexpected end of input")
+        kind, value = self.tokens[self.pos]
+        self.pos += 1
+        if kind == 'num':
+            return self.b.number(value)
+        if kind == 'name':
+            if value in _reserved_names():
+                raise Unsupported(f"name {value!r}")
+            return self.b.name(value)
+        if value == '(':
+            inner = self.expr()
+            if not self.take_op(')'):
+                raise Unsupported("unbalanced parentheses")
+            return inner
+        raise Unsupported("unexpected token")
+
+def parse(tokens, builder):
+    try:
+        return _Parser(tokens, builder).parse()
+    except (ArithmeticError, TypeError, ValueError, RecursionError) as e:
+        # e.g. over-long integer literals or very deep nesting: let sympify report it
+        raise Unsupported(str(e))
+
+class _SympyBuilder:
+    # Python operators on SymPy objects, exactly what sympify's eval runs
+
+    def number(self, text):
+        return sp.Float(text) if '.' in text else sp.Integer(int(text))
+
+    def name(self, text):
+        return sp.Symbol(text)
+
+    def add(self, a, b):
+        return a + b
+
+    def sub(self, a, b):
+        return a - b
+
+    def mul(self, a, b):
+        return a * b
+
+    def div(self, a, b):
+        return a / b
+
+    def pow(self, a, b):
+        return a ** b
+
+    def neg(self, a):
+        return -a
+
+SYMPY = _SympyBuilder()
+
+def parse_sympy(tokens):
+    return parse(tokens, SYMPY)
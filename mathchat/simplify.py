@@ -0,0 +1,284 @@
+from concurrent.futures import FIRST_COMPLETED, wait
+import os
+import time
+from ._sympy import sp
+from . import admission, factoring
+from .metrics import stopwatch
+from .parsing import Unsupported, normalize, parse_sympy
+from .stage_pool import PoolBusy, StageError, StageTimeout, WorkerDied
+from .steps import step
+from . import strategy
+
+# -------------------
+# Expression simplification pipeline (expand -> simplify -> factor)
+#
+# The simplify step runs the stages mathchat.strategy picks for the
+# expanded expression's class.  SIMPLIFY_STRATEGY=full always runs
+# sp.simplify instead, as the pipeline originally did.
+# -------------------
+
+STRATEGY = os.environ.get("SIMPLIFY_STRATEGY") or "auto"
+
+def parse_expr(expr_clean, tokens):
+    # build SymPy objects straight from the tokens; sympify only for the rest
+    if tokens is not None:
+        try:
+            return parse_sympy(tokens)
+        except Unsupported:
+            pass
+    return sp.sympify(expr_clean)
+
+_STAGES = {"parse": "sympify", "expand": "expand", "simplify": "simplify", "factor": "factor",
+           "cancel": "cancel", "trigsimp": "trigsimp", "powsimp": "powsimp"}
+
+def _run_stage(pool, deadline, stage, arg):
+    if pool is None:
+        if stage == "factor":
+            return factoring.factor(arg)
+        return getattr(sp, _STAGES[stage])(arg)
+    return pool.run(stage, arg, min(pool.stage_timeout, deadline - time.monotonic()))
+
+def _busy():
+    # no worker came free: the server is saturated, whatever stage it was
+    return dict(status="error", message="Server busy. Try again shortly."), 503
+
+def _drain(steps):
+    # run a step generator to the end and return its return value
+    while True:
+        try:
+            next(steps)
+        except StopIteration as done:
+            return done.value
+
+def iter_pipeline(expr, pool=None, deadline=None, strategy_name=None, factor=True):
+    """Generator form of run_pipeline: yields each step's record as soon as
+    its stage finishes and returns (response_dict, http_status)."""
+    if pool is not None and deadline is None:
+        deadline = time.monotonic() + pool.request_timeout
+    steps = []
+    current = expr
+    mark = stopwatch()
+    try:
+        # Step 1: expand
+        expanded = _run_stage(pool, deadline, "expand", current)
+        mark("expand")
+        if expanded != current:
+            steps.append(step("expand", result=expanded))
+            yield steps[-1]
+            current = expanded
+        # Step 2: simplify, with the stages for the expression's class
+        if (strategy_name or STRATEGY) == "full":
+            kind, stages = "other", ["simplify"]
+        else:
+            kind, stages = strategy.plan(current)
+        mark("classify")
+        before = current
+        for stage in stages:
+            simplified = _run_stage(pool, deadline, stage, current)
+            mark(stage)
+            if simplified != current:
+                steps.append(step(stage, result=simplified))
+                yield steps[-1]
+                current = simplified
+        if strategy.needs_fallback(kind, before, current):
+            simplified = _run_stage(pool, deadline, "simplify", current)
+            mark("simplify")
+            if simplified != current:
+                steps.append(step("simplify", result=simplified))
+                yield steps[-1]
+                current = simplified
+        # Step 3: factor if possible
+        if not factor:
+            return dict(status="ok", steps=steps, result=str(current),
+                        message="Factoring skipped: the polynomial's degree is too high."), 200
+        factored = _run_stage(pool, deadline, "factor", current)
+        mark("factor")
+        if factored != current:
+            steps.append(step("factor", result=factored))
+            yield steps[-1]
+            current = factored
+    except PoolBusy:
+        # not a partial answer: nothing about the input was too hard
+        return _busy()
+    except (StageTimeout, StageError) as e:
+        # a stage that overran, failed or lost its worker (out of memory,
+        # crashed): what completed before it is still a valid answer
+        return dict(status="partial", steps=steps, result=str(current),
+                    message=f"{e} (showing the last completed step)."), 200
+
+    return dict(status="ok", steps=steps, result=str(current)), 200
+
+def run_pipeline(expr, pool=None, deadline=None, strategy_name=None, factor=True):
+    """Run expand -> simplify -> factor, optionally in a StagePool.
+
+    If a stage runs past its deadline the response is marked "partial" and
+    carries the steps that completed before it.  strategy_name overrides
+    SIMPLIFY_STRATEGY ("auto" or "full"); factor=False leaves out the
+    factor stage.
+    """
+    return _drain(iter_pipeline(expr, pool, deadline, strategy_name, factor))
+
+def _text_key(expr_clean):
+    return ("simplify", expr_clean)
+
+def simplify_key(expr_str):
+    """The normalized key of an expression string, or None if it is empty."""
+    expr_str = (expr_str or "").strip()
+    return _text_key(normalize(expr_str)[0]) if expr_str else None
+
+def simplify_expression(expr_str, cache=None, pool=None, flights=None):
+    """Simplify one expression string; returns (response_dict, http_status).
+
+    With a ResultCache, results are looked up by the preprocessed text and,
+    after parsing, by the srepr of the expression, so inputs that differ
+    only in spacing or term order share one entry.  With a StagePool, parsing
+    and every pipeline stage run in worker processes under the pool's
+    per-stage and per-request deadlines; partial results are not cached.
+    With a SingleFlight, concurrent requests for the same preprocessed text
+    share one run and get the same response.
+    """
+    return _drain(simplify_steps(expr_str, cache, pool, flights))
+
+def simplify_events(expr_str, cache=None, pool=None, flights=None):
+    """Yield ("step", {"index", "step"}) as each stage finishes, then
+    ("result", response_dict) with the full /simplify response.  The steps
+    are records (see mathchat.steps)."""
+    steps = simplify_steps(expr_str, cache, pool, flights)
+    index = 0
+    while True:
+        try:
+            step = next(steps)
+        except StopIteration as done:
+            yield "result", done.value[0]
+            return
+        yield "step", dict(index=index, step=step)
+        index += 1
+
+def simplify_steps(expr_str, cache=None, pool=None, flights=None):
+    # generator behind simplify_expression: yields step records as they are
+    # computed (all at once for a cached or shared result) and returns the response
+    expr_str = (expr_str or "").strip()
+    if not expr_str:
+        return dict(status="error", message="Empty expression"), 400
+    mark = stopwatch()
+    expr_clean, tokens = normalize(expr_str)
+    mark("preprocess")
+    # rejects inputs sympify or expand would choke on, before any of it runs
+    cost, error = admission.check(expr_clean, tokens)
+    mark("admission")
+    if error is not None:
+        return dict(status="error", message=error), 400
+    factor = not admission.skip_factor(cost)
+
+    text_key = _text_key(expr_clean)
+    if cache is not None:
+        hit = cache.get(text_key)
+        mark("cache")
+        if hit is not None:
+            yield from hit[0]["steps"]
+            return hit
+    if flights is None:
+        return (yield from _simplify_clean(expr_clean, tokens, cache, pool, factor))
+
+    call, leader = flights.join(text_key)
+    if not leader:
+        # with a pool the leader's work ends within the request deadline;
+        # past it, the leader is being held up by its own caller
+        result = flights.wait(call, None if pool is None else pool.request_timeout)
+        mark("coalesce")
+        if result is not None:
+            yield from result[0]["steps"]
+            return result
+        # the leader gave up or is stalled; run it here instead
+        return (yield from _simplify_clean(expr_clean, tokens, cache, pool, factor))
+    result = None
+    try:
+        result = yield from _simplify_clean(expr_clean, tokens, cache, pool, factor)
+    finally:
+        flights.leave(text_key, call, result)
+    return result
+
+def _simplify_clean(expr_clean, tokens, cache, pool, factor):
+    mark = stopwatch()
+    deadline = None if pool is None else time.monotonic() + pool.request_timeout
+    try:
+        if pool is None:
+            expr = parse_expr(expr_clean, tokens)
+        else:
+            # parsing can blow up too (9**9**9**9), so it runs in the pool
+            expr = _run_stage(pool, deadline, "parse", expr_clean)
+    except PoolBusy:
+        return _busy()
+    except (StageTimeout, WorkerDied) as e:
+        return dict(status="error", message=f"{e}. Try simpler input."), 400
+    except Exception as e:
+        return dict(status="error", message=f"Invalid expression ({str(e)})"), 400
+    mark("sympify")
+
+    if cache is None:
+        return (yield from iter_pipeline(expr, pool, deadline, factor=factor))
+
+    # whether the factor stage runs depends on the input text's cost, not
+    # only on the expression it parses to, so it is part of the key
+    struct_key = ("simplify-srepr", sp.srepr(expr), factor)
+    result = cache.get(struct_key)
+    mark("cache")
+    if result is None:
+        result = yield from iter_pipeline(expr, pool, deadline, factor=factor)
+        if result[0]["status"] != "ok":
+            return result
+        cache.put(struct_key, result)
+    else:
+        yield from result[0]["steps"]
+    cache.put(_text_key(expr_clean), result)
+    return result
+
+# ------------------- Batches -------------------
+
+def _batch_item(expr_str, cache):
+    # cache lookup done in the parent so hits never reach the executor
+    if isinstance(expr_str, ValueError):
+        return None, (dict(status="error", message=str(expr_str)), 400)
+    if not isinstance(expr_str, str):
+        return None, (dict(status="error", message="Expression must be a string."), 400)
+    key = simplify_key(expr_str) if cache is not None else None
+    if key is None:
+        return None, None
+    return key, cache.get(key)
+
+def simplify_stream(expressions, executor=None, cache=None, window=64):
+    """Yield (index, response_dict) for an iterable of expressions, in completion order.
+
+    At most `window` expressions are in flight at once and `expressions` is
+    consumed lazily, so memory stays bounded for arbitrarily long inputs.
+    """
+    pending = {}
+
+    def finish(future):
+        index, key = pending.pop(future)
+        try:
+            result = future.result()
+        except Exception as e:
+            return index, dict(status="error", message=f"Worker failed ({e.__class__.__name__})")
+        if key is not None and result[0]["status"] == "ok":
+            cache.put(key, result)
+        return index, result[0]
+
+    for index, expr_str in enumerate(expressions):
+        key, hit = _batch_item(expr_str, cache)
+        if hit is not None:
+            yield index, hit[0]
+            continue
+        if executor is None:
+            yield index, simplify_expression(expr_str, cache=cache)[0]
+            continue
+        pending[executor.submit(simplify_expression, expr_str)] = (index, key)
+        if len(pending) >= window:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield finish(future)
+
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield finish(future)
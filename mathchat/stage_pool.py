@@ -0,0 +1,190 @@
+import multiprocessing as mp
+import queue
+import threading
+import time
+from .env import env_float, env_int
+
+# -------------------
+# Isolated execution of SymPy pipeline stages
+#
+# A fixed set of worker processes is started on first use and reused across
+# requests.  Each stage call gets a deadline; a worker that overruns it is
+# killed and replaced, so one pathological input cannot pin a Flask worker.
+# A new worker warms up (mathchat.warmup) and reports ready before it is
+# given its first stage.  A stage's timeout covers the whole call: waiting
+# for a free, warmed-up worker and running the stage.
+# -------------------
+
+class StageTimeout(Exception):
+    def __init__(self, stage, message="Timed out during"):
+        super().__init__(f"{message} {stage}")
+        self.stage = stage
+
+class PoolBusy(StageTimeout):
+    """No worker came free in time: the server is saturated, not the input too hard."""
+
+    def __init__(self, stage):
+        super().__init__(stage, "No worker free for")
+
+class StageError(Exception):
+    """An exception raised inside a worker, re-raised with its message."""
+
+class WorkerDied(StageError):
+    """The worker exited mid-stage (out of memory, crashed); it has been replaced."""
+
+    def __init__(self, stage):
+        super().__init__(f"Worker process died during {stage}")
+        self.stage = stage
+
+def _worker_main(conn):
+    import sympy as sp
+    from .factoring import factor
+    from .sympy_cache import SympyCache
+    from .warmup import warm_stages
+    stages = {
+        "parse": sp.sympify,
+        "expand": sp.expand,
+        "simplify": sp.simplify,
+        "factor": factor,
+        "cancel": sp.cancel,
+        "trigsimp": sp.trigsimp,
+        "powsimp": sp.powsimp,
+    }
+    warm_stages(stages)
+    sympy_cache = SympyCache.from_env()
+    conn.send(("ready", None))
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            return
+        if msg is None:
+            return
+        stage, arg = msg
+        try:
+            conn.send(("ok", stages[stage](arg)))
+        except Exception as e:
+            conn.send(("error", str(e)))
+        sympy_cache.tick()
+
+def _left(deadline):
+    return max(0.0, deadline - time.monotonic())
+
+class _Worker:
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def wait_ready(self, timeout):
+        # consumes the worker's ready message; False if it has not come yet
+        if not self.ready and self.conn.poll(timeout):
+            self.ready = self.conn.recv()[0] == "ready"
+        return self.ready
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(1)
+        self.conn.close()
+
+class StagePool:
+    def __init__(self, size=2, stage_timeout=5.0, request_timeout=15.0):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.size = size
+        self.stage_timeout = stage_timeout
+        self.request_timeout = request_timeout
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._ctx = None
+        self.restarts = 0
+
+    @classmethod
+    def from_env(cls):
+        """Pool configured from SIMPLIFY_ISOLATION_WORKERS (unset or 0 disables it)."""
+        size = env_int("SIMPLIFY_ISOLATION_WORKERS", 0)
+        if size <= 0:
+            return None
+        return cls(
+            size=size,
+            stage_timeout=env_float("SIMPLIFY_STAGE_TIMEOUT", 5.0),
+            request_timeout=env_float("SIMPLIFY_REQUEST_TIMEOUT", 15.0),
+        )
+
+    def _start(self):
+        # started lazily so spawn/forkserver children re-importing the app
+        # module do not start pools of their own
+        with self._lock:
+            if self._ctx is not None:
+                return
+            methods = mp.get_all_start_methods()
+            if "forkserver" in methods:
+                ctx = mp.get_context("forkserver")
+                ctx.set_forkserver_preload(["sympy"])
+            else:
+                ctx = mp.get_context("spawn")
+            for _ in range(self.size):
+                self._idle.put(_Worker(ctx))
+            self._ctx = ctx
+
+    def run(self, stage, arg, timeout):
+        """Run one stage in a worker within `timeout` seconds in all.
+
+        Raises PoolBusy if no warmed-up worker comes free in time,
+        StageTimeout if the stage itself overruns, StageError if it fails
+        and WorkerDied if its worker exits.
+        """
+        self._start()
+        if timeout <= 0:
+            raise StageTimeout(stage)
+        deadline = time.monotonic() + timeout
+        try:
+            worker = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise PoolBusy(stage)
+        try:
+            # still warming up: it goes back to the pool
+            if not worker.wait_ready(_left(deadline)) or _left(deadline) == 0:
+                raise PoolBusy(stage)
+            worker.conn.send((stage, arg))
+            if not worker.conn.poll(_left(deadline)):
+                self._replace(worker)
+                worker = None
+                raise StageTimeout(stage)
+            status, value = worker.conn.recv()
+        except (EOFError, OSError):
+            self._replace(worker)
+            worker = None
+            raise WorkerDied(stage)
+        finally:
+            if worker is not None:
+                self._idle.put(worker)
+        if status == "error":
+            raise StageError(value)
+        return value
+
+    def _replace(self, worker):
+        worker.kill()
+        self.restarts += 1
+        self._idle.put(_Worker(self._ctx))
+
+    def close(self):
+        with self._lock:
+            while True:
+                try:
+                    worker = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                worker.kill()
+            self._ctx = None
+
+    def stats(self):
+        return dict(
+            size=self.size,
+            idle=self._idle.qsize(),
+            restarts=self.restarts,
+            stage_timeout=self.stage_timeout,
+            request_timeout=self.request_timeout,
+        )
@@ -0,0 +1,75 @@
+# -------------------
+# Step records
+#
+# The engines describe each step as a record [stage, operands, result]:
+# strings, with result None for stages that have none, e.g.
+#     ["combine", ["3", "1", "x"], "2"]
+# MessagePack responses send the records as they are; JSON responses get
+# the sentence rendered from each one with the templates below,
+#     "Combine like terms: (3)*x - (1)*x = (2)*x"
+# so cached and stored results serve both formats.
+# -------------------
+
+# kind -> stage -> template: {0}, {1}, ... are the operands, {r} the result
+TEMPLATES = {
+    "solve": {
+        "original": "Original equation: {0}  =  {1}",
+        "rewrite": "Rewrite clearly: {0} = {1}",
+        "collect": "Collect variable terms on left: subtract ({0})*{1} from both sides.",
+        "combine": "Combine like terms: ({0})*{2} - ({1})*{2} = ({r})*{2}",
+        "moved": "After moving variable terms: ({0})*{1} + ({2}) = ({3})",
+        "move_constants": "Move constants to right: subtract ({0}) from both sides.",
+        "result": "Result: ({0})*{1} = ({r})",
+        "divide": "Divide both sides by ({1}): {2} = ({0}) / ({1})",
+        "simplify": "Simplify: {0} = {r}",
+    },
+    "simplify": {
+        "expand": "Expand: {r}",
+        "cancel": "Cancel common factors: {r}",
+        "trigsimp": "Simplify trigonometric functions: {r}",
+        "powsimp": "Combine powers: {r}",
+        "simplify": "Simplify: {r}",
+        "factor": "Factor: {r}",
+    },
+    "system": {
+        "system": "System of {0} equations in {1} unknowns ({2}):",
+        "equation": "Equation {0}: {1}",
+        "eliminate": "Use equation {0} to eliminate {1} from equation {2}: subtract ({3}) times equation {0}.",
+        "reduce": "Equation {0} becomes: {r}",
+        "back_substitute": "Back-substitute: {0} = {r}",
+    },
+}
+
+# the templates' bound format methods, looked up once per body
+_RENDER = {kind: {stage: template.format for stage, template in templates.items()}
+           for kind, templates in TEMPLATES.items()}
+
+def step(stage, *operands, result=None):
+    """The record for one step.  Operands and result are printed with
+    format(), as in an f-string: SymPy Floats print differently with str()."""
+    return [stage, [format(o) for o in operands], None if result is None else format(result)]
+
+def render_step(kind, record):
+    """The sentence for one step record of an engine of this kind."""
+    stage, operands, result = record
+    return _RENDER[kind][stage](*operands, r=result)
+
+def strip_srepr(body):
+    """body without the "original" step, SymPy's srepr of both sides (a copy if there was one)."""
+    if "results" in body:
+        return dict(body, results=[strip_srepr(result) for result in body["results"]])
+    steps = body.get("steps")
+    if not steps or steps[0][0] != "original":
+        return body
+    return dict(body, steps=steps[1:])
+
+def render_body(kind, body, srepr=True):
+    """The JSON form of an engine's response body (never modifies it)."""
+    if not srepr:
+        body = strip_srepr(body)
+    if "results" in body:
+        return dict(body, results=[render_body(kind, result) for result in body["results"]])
+    if "steps" not in body:
+        return body
+    render = _RENDER[kind]
+    return dict(body, steps=[render[stage](*operands, r=result) for stage, operands, result in body["steps"]])
@@ -0,0 +1,242 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from ._sympy import sp
+from .env import env_int
+
+# -------------------
+# Persistent result store (SQLite)
+#
+# A second tier under ResultCache for results that are expensive to
+# recompute, shared by every process that opens the same file and kept
+# across restarts.  Keys are sha256 hashes of the cache key (for the
+# structural keys, the srepr of the parsed input) salted with fingerprint():
+# the SymPy version and the settings that change /simplify's output, so
+# upgrading SymPy or switching SIMPLIFY_STRATEGY or FACTOR_BUDGET starts
+# from a cold store instead of serving results computed differently.
+# Values are the engines'
+# (response_dict, http_status) tuples as JSON.
+#
+# The database runs in WAL mode, so any number of processes read while one
+# writes.  Eviction is approximately LRU: each row has a last-used time,
+# refreshed on a hit at most once per TOUCH_INTERVAL, and when the entry or
+# byte limit is exceeded the least recently used rows are deleted down to
+# 90% of it.  Limits are checked on open and every CHECK_EVERY writes.
+#
+# Configuration comes from the environment (the store is off without a path):
+#   RESULT_STORE_PATH         database file
+#   RESULT_STORE_MAX_BYTES    stored value bytes (default 256 MiB)
+#   RESULT_STORE_MAX_ENTRIES  row count (default unlimited)
+#
+# Warm it from a corpus, one input per line (equations contain "="):
+#   python -m mathchat.store corpus.txt --path results.db [--workers 4]
+# -------------------
+
+# bumped when the engines' output changes for the same input
+FORMAT = 3
+TOUCH_INTERVAL = 60.0
+CHECK_EVERY = 64
+
+def fingerprint():
+    """Everything besides the input that decides a stored result."""
+    from .factoring import FACTOR_BUDGET
+    from .simplify import STRATEGY
+    return (FORMAT, sp.__version__, STRATEGY, FACTOR_BUDGET)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key BLOB PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_used ON results (used);
+"""
+
+class DiskStore:
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, max_entries=None, timeout=5.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.timeout = timeout
+        # one connection per thread and process; sqlite3 connections
+        # must not cross either
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+        # fingerprint() imports SymPy, so it is taken on the first lookup
+        self._salt = None
+        self._connect()
+        self._evict()
+
+    @classmethod
+    def from_env(cls, prefix="RESULT_STORE", path=None):
+        """Open the store at `path` or <prefix>_PATH, or return None if neither is set."""
+        path = path or os.environ.get(f"{prefix}_PATH")
+        if not path:
+            return None
+        return cls(
+            path,
+            max_bytes=env_int(f"{prefix}_MAX_BYTES", 256 * 1024 * 1024),
+            max_entries=env_int(f"{prefix}_MAX_ENTRIES"),
+        )
+
+    def _connect(self):
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            local.conn = conn
+            local.pid = os.getpid()
+        return local.conn
+
+    def _hash(self, key):
+        if self._salt is None:
+            self._salt = fingerprint()
+        return hashlib.sha256(repr((self._salt, key)).encode()).digest()
+
+    def get(self, key):
+        """Return the stored value, or None on a miss (or a database error)."""
+        digest = self._hash(key)
+        try:
+            conn = self._connect()
+            row = conn.execute("SELECT value, used FROM results WHERE key = ?", (digest,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            now = time.time()
+            if now - row[1] > TOUCH_INTERVAL:
+                conn.execute("UPDATE results SET used = ? WHERE key = ?", (now, digest))
+        except sqlite3.Error:
+            self.errors += 1
+            return None
+        self.hits += 1
+        body, code = json.loads(row[0])
+        return body, code
+
+    def put(self, key, value):
+        data = json.dumps(value, separators=(",", ":")).encode()
+        if self.max_bytes is not None and len(data) > self.max_bytes:
+            return
+        try:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO results (key, value, size, used) VALUES (?, ?, ?, ?)",
+                (self._hash(key), data, len(data), time.time()))
+        except sqlite3.Error:
+            self.errors += 1
+            return
+        with self._lock:
+            self._writes += 1
+            check = self._writes % CHECK_EVERY == 0
+        if check:
+            self._evict()
+
+    def _evict(self):
+        try:
+            conn = self._connect()
+            entries, size = conn.execute("SELECT count(*), coalesce(sum(size), 0) FROM results").fetchone()
+            excess = 0
+            if self.max_entries is not None and entries > self.max_entries:
+                excess = entries - int(self.max_entries * 0.9)
+            if self.max_bytes is not None and size > self.max_bytes:
+                # rows to drop for the bytes, assuming average-sized rows
+                excess = max(excess, entries - int(entries * self.max_bytes * 0.9 / size))
+            if excess > 0:
+                conn.execute("DELETE FROM results WHERE key IN "
+                             "(SELECT key FROM results ORDER BY used LIMIT ?)", (excess,))
+                self.evictions += excess
+        except sqlite3.Error:
+            self.errors += 1
+
+    def clear(self):
+        self._connect().execute("DELETE FROM results")
+
+    def stats(self):
+        try:
+            entries, size = self._connect().execute(
+                "SELECT count(*), coalesce(sum(size), 0) FROM results").fetchone()
+        except sqlite3.Error:
+            entries = size = None
+        lookups = self.hits + self.misses
+        return dict(
+            path=self.path,
+            entries=entries,
+            bytes=size,
+            max_entries=self.max_entries,
+            max_bytes=self.max_bytes,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            errors=self.errors,
+            hit_rate=(self.hits / lookups) if lookups else 0.0,
+        )
+
+# ------------------- Warming -------------------
+
+_warm_cache = None
+
+def _init_warm(path):
+    global _warm_cache
+    from .cache import ResultCache
+    _warm_cache = ResultCache(max_entries=1, store=DiskStore.from_env(path=path))
+
+def _warm_one(text):
+    # run the input through the engine so its structural result lands in the store
+    from .linear import solve_equation
+    from .simplify import simplify_expression
+    if "=" in text:
+        body, _ = solve_equation(text, cache=_warm_cache)
+    else:
+        body, _ = simplify_expression(text, cache=_warm_cache)
+    return body["status"]
+
+def _read_corpus(paths):
+    for path in paths:
+        with (sys.stdin if path == "-" else open(path)) as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    yield line
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the persistent result store from a corpus.")
+    parser.add_argument("corpus", nargs="+", help="files with one equation or expression per line (- for stdin)")
+    parser.add_argument("--path", default=os.environ.get("RESULT_STORE_PATH"),
+                        help="database file (default: RESULT_STORE_PATH)")
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    if not args.path:
+        parser.error("give --path or set RESULT_STORE_PATH")
+
+    texts = list(dict.fromkeys(_read_corpus(args.corpus)))
+    # create the schema once before the workers race to it
+    store = DiskStore.from_env(path=args.path)
+    before = store.stats()["entries"]
+    started = time.monotonic()
+    if args.workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(args.workers, initializer=_init_warm, initargs=(args.path,)) as executor:
+            statuses = list(executor.map(_warm_one, texts, chunksize=8))
+    else:
+        _init_warm(args.path)
+        statuses = [_warm_one(text) for text in texts]
+    after = store.stats()["entries"]
+    counts = {s: statuses.count(s) for s in sorted(set(statuses))}
+    print(f"{len(texts)} inputs in {time.monotonic() - started:.1f} s "
+          f"({', '.join(f'{n} {s}' for s, n in counts.items())}); "
+          f"store has {after} entries ({after - before:+d})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+from ._sympy import sp
+
+# -------------------
+# Simplification strategy selection
+#
+# sp.simplify tries dozens of rewrites and keeps the shortest, which is
+# wasted work for the inputs we mostly see.  The expanded expression is
+# classified with one walk over its tree and gets the stages for its class:
+#   polynomial  - none: the expanded form is canonical and factor follows
+#   rational    - cancel (one fraction over a common denominator)
+#   elementary  - trigsimp / powsimp / cancel for what it contains, then
+#                 sp.simplify only if they did not make it any shorter
+#   other       - sp.simplify
+# -------------------
+
+KINDS = ("polynomial", "rational", "elementary", "other")
+
+def _is_constant_atom(node):
+    return node.is_Number or node.is_NumberSymbol or node is sp.I
+
+def classify(expr):
+    """Return (kind, features) for an expression; features is a set of
+    "trig", "power" and "division" found in it."""
+    kind = 0
+    features = set()
+    trig = (sp.functions.elementary.trigonometric.TrigonometricFunction,
+            sp.functions.elementary.hyperbolic.HyperbolicFunction)
+    for node in sp.preorder_traversal(expr):
+        if node.is_Atom:
+            if node.is_Symbol or _is_constant_atom(node):
+                continue
+            return "other", features
+        if node.is_Add or node.is_Mul:
+            continue
+        if node.is_Pow:
+            if node.exp.is_Integer:
+                if node.exp < 0:
+                    features.add("division")
+                    kind = max(kind, 1)
+            else:
+                # sqrt(x), x^(1/3), 2^x, x^y
+                features.add("power")
+                kind = 2
+            continue
+        if isinstance(node, trig):
+            features.add("trig")
+        elif isinstance(node, sp.exp):
+            features.add("power")
+        elif not isinstance(node, sp.log):
+            return "other", features
+        kind = 2
+    return KINDS[kind], features
+
+def plan(expr):
+    """Return (kind, stages): the stages replacing sp.simplify for expr."""
+    kind, features = classify(expr)
+    if kind == "polynomial":
+        return kind, []
+    if kind == "rational":
+        return kind, ["cancel"]
+    if kind == "elementary":
+        stages = [stage for stage, feature in (("trigsimp", "trig"), ("powsimp", "power"), ("cancel", "division"))
+                  if feature in features]
+        return kind, stages
+    return kind, ["simplify"]
+
+def needs_fallback(kind, before, after):
+    # the targeted stages for elementary functions do not cover everything
+    # sp.simplify does; when they made no progress, the full search runs
+    return kind == "elementary" and sp.count_ops(after) >= sp.count_ops(before)
@@ -0,0 +1,80 @@
+import sys
+import threading
+import time
+from .env import env_float, env_int
+
+# -------------------
+# Bounded SymPy cache
+#
+# SymPy memoizes its core constructors and methods (Symbol interning,
+# Add/Mul/Pow construction, expand, has, ...) in ~125 LRU caches, each
+# capped at SYMPY_CACHE_SIZE entries (SymPy's own setting, default 1000).
+# Together they can hold well over 100k entries, each of which may keep a
+# large expression alive, so a long-running process creeps upwards.
+# SympyCache keeps the total in check: every CHECK_EVERY calls to tick()
+# it counts the entries, and it clears SymPy's cache once they pass
+# max_entries or clear_interval seconds have gone by since the last clear.
+# Clearing only costs speed (the entries are rebuilt on demand); results
+# do not depend on it.
+#
+# Configuration comes from the environment:
+#   SYMPY_CACHE_MAX_ENTRIES     total entries before a clear (default 20000)
+#   SYMPY_CACHE_CLEAR_INTERVAL  seconds between clears (default 600, 0 = never)
+# -------------------
+
+# counting walks every cached function (~0.3 ms), so it is not done per call
+CHECK_EVERY = 16
+
+def _registry():
+    # nothing is cached before SymPy is imported, and this must not import it
+    module = sys.modules.get("sympy.core.cache")
+    return module.CACHE if module is not None else ()
+
+class SympyCache:
+    def __init__(self, max_entries=20000, clear_interval=600.0):
+        self.max_entries = max_entries
+        self.clear_interval = clear_interval
+        self._lock = threading.Lock()
+        self._ticks = 0
+        self._last_clear = time.monotonic()
+        self.clears = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(max_entries=env_int("SYMPY_CACHE_MAX_ENTRIES", 20000),
+                   clear_interval=env_float("SYMPY_CACHE_CLEAR_INTERVAL", 600.0))
+
+    def entries(self):
+        return sum(fn.cache_info().currsize for fn in _registry())
+
+    def tick(self):
+        """Call after each unit of work; clears SymPy's cache when it is due.
+        Returns whether it did."""
+        with self._lock:
+            self._ticks += 1
+            if self._ticks < CHECK_EVERY:
+                return False
+            self._ticks = 0
+        expired = self.clear_interval > 0 and time.monotonic() - self._last_clear >= self.clear_interval
+        if not expired and self.entries() <= self.max_entries:
+            return False
+        self.clear()
+        return True
+
+    def clear(self):
+        for fn in _registry():
+            fn.cache_clear()
+        with self._lock:
+            self._last_clear = time.monotonic()
+            self.clears += 1
+
+    def stats(self):
+        hits = misses = entries = 0
+        for fn in _registry():
+            info = fn.cache_info()
+            hits += info.hits
+            misses += info.misses
+            entries += info.currsize
+        return dict(entries=entries, max_entries=self.max_entries, clear_interval=self.clear_interval,
+                    clears=self.clears, since_clear=round(time.monotonic() - self._last_clear, 1),
+                    hits=hits, misses=misses)
@@ -0,0 +1,271 @@
+from collections import defaultdict
+from fractions import Fraction
+import heapq
+import warnings
+from ._sympy import sp
+from .linear import LINEAR, format_term, split_equation
+from .parsing import Unsupported, parse
+from .steps import step
+
+# -------------------
+# Systems of linear equations
+#
+# Each equation becomes a sparse row {column: coefficient} plus a constant.
+# Small systems are eliminated exactly with Fractions and explained step by
+# step; large ones use floating point (SciPy's sparse LU when installed) and
+# are reported as a summary.  Elimination only touches nonzero entries and
+# picks sparse pivot rows, so cost follows the number of nonzeros and fill-in
+# rather than the cube of the number of unknowns.
+# -------------------
+
+_scipy = None
+
+def _load_scipy():
+    # imported on the first large system: it is optional and slow to import
+    global _scipy
+    if _scipy is None:
+        try:
+            import numpy as np
+            from scipy.sparse import csr_matrix
+            from scipy.sparse.linalg import spsolve
+            _scipy = (np, csr_matrix, spsolve)
+        except ImportError:  # large systems use the pure-Python float path
+            _scipy = False
+    return _scipy
+
+# up to this many unknowns the elimination is listed step by step
+STEP_LIMIT = 8
+# up to this many unknowns the system is solved with exact fractions
+EXACT_LIMIT = 200
+
+def _fraction(value):
+    if value.is_Float:
+        # exactly the decimal that was written (SymPy prints it back to 15 digits)
+        return Fraction(str(value))
+    if not value.is_Rational:
+        raise ValueError("coefficients must be numbers")
+    return Fraction(int(value.p), int(value.q))
+
+def _sympy_row(lhs_s, rhs_s):
+    # fallback for inputs the fast parser rejects, e.g. 0.5*x or (x+y)**1
+    try:
+        expr = sp.sympify(lhs_s) - sp.sympify(rhs_s)
+    except Exception as e:
+        raise ValueError(f"could not parse ({e})")
+    syms = sorted(expr.free_symbols, key=lambda s: s.name)
+    if not syms:
+        return {}, -_fraction(expr)
+    try:
+        poly = sp.Poly(expr, *syms)
+    except sp.PolynomialError:
+        raise ValueError("non-linear term")
+    if poly.total_degree() > 1:
+        raise ValueError("non-linear term")
+    row = {}
+    for s in syms:
+        c = _fraction(poly.coeff_monomial(s))
+        if c:
+            row[s.name] = c
+    return row, -_fraction(poly.coeff_monomial(1))
+
+def parse_row(eq):
+    """Turn one equation into ({name: coefficient}, constant) with all terms on the left."""
+    error, eqn = split_equation(eq)
+    if error is not None:
+        raise ValueError(error[0]["message"])
+    try:
+        if eqn.lhs_tokens is None or eqn.rhs_tokens is None:
+            raise Unsupported("not tokenizable")
+        lhs = parse(eqn.lhs_tokens, LINEAR)
+        rhs = parse(eqn.rhs_tokens, LINEAR)
+    except Unsupported:
+        return _sympy_row(eqn.lhs, eqn.rhs)
+    row = dict(lhs[0])
+    for name, c in rhs[0].items():
+        c = row.get(name, 0) - c
+        if c:
+            row[name] = c
+        else:
+            row.pop(name, None)
+    return row, rhs[1] - lhs[1]
+
+def format_row(row, const, names):
+    terms = [format_term(row[c], names[c]) for c in sorted(row)]
+    if not terms:
+        return f"0 = {const}"
+    text = terms[0]
+    for t in terms[1:]:
+        text += f" - {t[1:]}" if t.startswith('-') else f" + {t}"
+    return f"{text} = {const}"
+
+def _eliminate(rows, consts, ncols, exact, steps=None, names=None):
+    """Sparse Gaussian elimination in place; returns [(column, pivot_row), ...]."""
+    col_rows = defaultdict(set)
+    for r, row in enumerate(rows):
+        for c in row:
+            col_rows[c].add(r)
+    if exact:
+        tol = 0
+    else:
+        biggest = max((abs(v) for row in rows for v in row.values()), default=1.0)
+        tol = 1e-12 * biggest
+
+    active = set(range(len(rows)))
+    order = []
+    # dynamic minimum-degree ordering: always eliminate the column with the
+    # fewest remaining entries next, which keeps fill-in low (heap entries
+    # go stale as counts change and are re-queued when popped)
+    heap = [(len(col_rows[c]), c) for c in range(ncols)]
+    heapq.heapify(heap)
+    done = set()
+    while heap:
+        count, c = heapq.heappop(heap)
+        if c in done:
+            continue
+        if count != len(col_rows[c]):
+            heapq.heappush(heap, (len(col_rows[c]), c))
+            continue
+        done.add(c)
+        candidates = list(col_rows[c])
+        if not candidates:
+            continue
+        if exact:
+            p = min(candidates, key=lambda r: (len(rows[r]), r))
+        else:
+            # threshold partial pivoting: sparse rows among the numerically safe ones
+            big = max(abs(rows[r][c]) for r in candidates)
+            p = min((r for r in candidates if abs(rows[r][c]) >= 0.1 * big),
+                    key=lambda r: (len(rows[r]), r))
+        active.discard(p)
+        order.append((c, p))
+        prow = rows[p]
+        pivot = prow[c]
+        # col_rows only tracks rows that can still be eliminated
+        for k in prow:
+            col_rows[k].discard(p)
+        for r in candidates:
+            if r == p:
+                continue
+            row = rows[r]
+            f = row[c] / pivot
+            for k, v in prow.items():
+                value = row.get(k, 0) - f * v
+                if abs(value) <= tol or k == c:
+                    if k in row:
+                        del row[k]
+                        col_rows[k].discard(r)
+                else:
+                    if k not in row:
+                        col_rows[k].add(r)
+                    row[k] = value
+            consts[r] -= f * consts[p]
+            if steps is not None:
+                steps.append(step("eliminate", p + 1, names[c], r + 1, f))
+                steps.append(step("reduce", r + 1, result=format_row(row, consts[r], names)))
+        for k in prow:
+            if k not in done:
+                heapq.heappush(heap, (len(col_rows[k]), k))
+    return order, active
+
+def _back_substitute(rows, consts, order):
+    values = {}
+    for c, p in reversed(order):
+        row = rows[p]
+        total = consts[p]
+        for k, v in row.items():
+            if k != c:
+                total -= v * values.get(k, 0)
+        values[c] = total / row[c]
+    return values
+
+def _degenerate(rows, consts, order, active, ncols, exact):
+    tol = 0 if exact else 1e-9 * max((abs(v) for v in consts), default=1.0)
+    for r in active:
+        if abs(consts[r]) > tol:
+            return dict(status="error", message=f"No solution (contradiction). Equation {r + 1} reduces to 0 = {consts[r]}."), 200
+    if len(order) < ncols:
+        return dict(status="error", message=f"Infinite solutions. The system has rank {len(order)} but {ncols} unknowns."), 200
+    return None
+
+def _scipy_solve(rows, consts, ncols):
+    # square, nonsingular systems only; anything else is left to the own elimination
+    if len(rows) != ncols or not _load_scipy():
+        return None
+    np, csr_matrix, spsolve = _scipy
+    data, indices, indptr = [], [], [0]
+    for row in rows:
+        for c, v in row.items():
+            indices.append(c)
+            data.append(float(v))
+        indptr.append(len(indices))
+    a = csr_matrix((data, indices, indptr), shape=(len(rows), ncols))
+    b = np.array([float(v) for v in consts])
+    # a singular matrix warns (MatrixRankWarning) and comes back as NaNs
+    with warnings.catch_warnings(), np.errstate(all="ignore"):
+        warnings.simplefilter("ignore")
+        try:
+            x = spsolve(a.tocsc(), b)
+        except RuntimeError:
+            return None
+    if not np.all(np.isfinite(x)):
+        return None
+    residual = float(np.max(np.abs(a @ x - b), initial=0.0))
+    if residual > 1e-8 * (float(np.max(np.abs(b), initial=0.0)) + 1.0):
+        return None
+    return {c: float(v) for c, v in enumerate(x)}, residual
+
+def solve_system(equations):
+    """Solve a list of linear equation strings; returns (response_dict, http_status)."""
+    if not equations:
+        return dict(status="error", message="Empty system."), 400
+    parsed = []
+    for i, eq in enumerate(equations):
+        if not isinstance(eq, str):
+            return dict(status="error", message=f"Equation {i + 1}: must be a string."), 400
+        try:
+            parsed.append(parse_row(eq))
+        except ValueError as e:
+            return dict(status="error", message=f"Equation {i + 1}: {e}"), 400
+
+    names = sorted({name for row, _ in parsed for name in row})
+    if not names:
+        return dict(status="error", message="No variable detected. Use letters for the unknowns (e.g. x, y)."), 400
+    column = {name: c for c, name in enumerate(names)}
+    ncols = len(names)
+    nonzeros = sum(len(row) for row, _ in parsed)
+
+    if ncols <= EXACT_LIMIT:
+        rows = [{column[n]: v for n, v in row.items()} for row, _ in parsed]
+        consts = [const for _, const in parsed]
+        steps = None
+        if ncols <= STEP_LIMIT:
+            steps = [step("system", len(rows), ncols, ", ".join(names))]
+            steps += [step("equation", r + 1, format_row(row, consts[r], names)) for r, row in enumerate(rows)]
+        order, active = _eliminate(rows, consts, ncols, True, steps, names)
+        bad = _degenerate(rows, consts, order, active, ncols, True)
+        if bad is not None:
+            return bad
+        values = _back_substitute(rows, consts, order)
+        solution = {names[c]: str(values[c]) for c in range(ncols)}
+        if steps is None:
+            return dict(status="ok", method="exact", solution=solution,
+                        summary=dict(equations=len(rows), unknowns=ncols, nonzeros=nonzeros)), 200
+        steps += [step("back_substitute", names[c], result=values[c]) for c, _ in reversed(order)]
+        return dict(status="ok", method="exact", steps=steps, solution=solution), 200
+
+    rows = [{column[n]: float(v) for n, v in row.items()} for row, _ in parsed]
+    consts = [float(const) for _, const in parsed]
+    summary = dict(equations=len(rows), unknowns=ncols, nonzeros=nonzeros)
+    fast = _scipy_solve(rows, consts, ncols)
+    if fast is not None:
+        values, residual = fast
+        summary["residual"] = residual
+        return dict(status="ok", method="sparse-lu", summary=summary,
+                    solution={names[c]: values[c] for c in range(ncols)}), 200
+    order, active = _eliminate(rows, consts, ncols, False)
+    bad = _degenerate(rows, consts, order, active, ncols, False)
+    if bad is not None:
+        return bad
+    values = _back_substitute(rows, consts, order)
+    return dict(status="ok", method="sparse-elimination", summary=summary,
+                solution={names[c]: values[c] for c in range(ncols)}), 200
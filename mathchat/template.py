@@ -0,0 +1,285 @@
+from collections import namedtuple
+from fractions import Fraction
+import itertools
+import math
+import operator
+import re
+from ._sympy import sp
+from .linear import degenerate, linear_steps, no_variable, split_equation, sympify_side
+
+# -------------------
+# Template solving
+#
+# One equation shape solved for many parameter values, e.g. a*x + b = c*x + d
+# for an exercise set.  The template is parsed once into the coefficient of
+# the unknown and the constant of each side, as polynomials in the
+# parameters.  These are evaluated for every parameter tuple at once with
+# exact integer arithmetic on NumPy arrays (int64 while the values are sure
+# to fit, Python ints beyond that), or tuple by tuple with Fractions when
+# NumPy is missing.  Each instance gets the body /solve returns for the
+# template with its values substituted, plus "degenerate" ("identity" or
+# "contradiction") where the unknown's coefficient cancels.
+# -------------------
+
+# a polynomial in the parameters: (denominator, [(integer coefficient, exponents)])
+Template = namedtuple("Template", "var params parts")
+
+_FRACTION_RE = re.compile(r"-?\d+(/\d+)?")
+
+def _integer_poly(terms):
+    denominator = 1
+    for c in terms.values():
+        denominator = math.lcm(denominator, int(c.q))
+    return denominator, [(int(c * denominator), monom) for monom, c in terms.items() if c]
+
+def compile_template(template, params):
+    """Parse a template; returns (error_response, None) or (None, Template)."""
+    error, eqn = split_equation(template)
+    if error is not None:
+        return error, None
+    try:
+        sides = [sympify_side(eqn.lhs, eqn.lhs_tokens), sympify_side(eqn.rhs, eqn.rhs_tokens)]
+    except Exception as e:
+        return (dict(status="error", message=f"Could not parse template. Try simpler input. ({str(e)})"), 400), None
+    names = {s.name for side in sides for s in side.free_symbols}
+    for name in params:
+        if name not in names:
+            return (dict(status="error", message=f"Parameter {name} does not appear in the template."), 400), None
+    unknowns = sorted(names - set(params))
+    if len(unknowns) != 1:
+        found = ", ".join(unknowns) or "none"
+        return (dict(status="error", message=f"The template must have exactly one unknown besides the parameters (found: {found})."), 400), None
+    var = sp.Symbol(unknowns[0])
+
+    parts = []
+    for side in sides:
+        if side.has(sp.Float):
+            return (dict(status="error", message="Write the template's numbers exactly (1/2, not 0.5)."), 400), None
+        try:
+            poly = sp.Poly(side, var, *[sp.Symbol(p) for p in params], domain=sp.QQ)
+        except (sp.PolynomialError, sp.polys.polyerrors.CoercionFailed):
+            return (dict(status="error", message=f"The template must be a polynomial in {var} and the parameters."), 400), None
+        if poly.degree(var) > 1:
+            return (dict(status="error", message=f"The template must be linear in {var}."), 400), None
+        coeff, const = {}, {}
+        for monom, c in poly.terms():
+            (coeff if monom[0] else const)[monom[1:]] = c
+        parts += [_integer_poly(coeff), _integer_poly(const)]
+    return None, Template(var.name, tuple(params), tuple(parts))
+
+def _template_values(spec):
+    # [1, -2, "3/4"] | {"start", "stop", "step"} with stop included
+    if isinstance(spec, dict):
+        start, stop, step = spec.get("start", 0), spec.get("stop"), spec.get("step", 1)
+        if not all(type(v) is int for v in (start, stop, step)) or step == 0:
+            raise ValueError("a range needs integer start, stop and a nonzero step")
+        return range(start, stop + (1 if step > 0 else -1), step)
+    if not isinstance(spec, list) or not spec:
+        raise ValueError("give a list of values or {start, stop, step}")
+    values = []
+    for v in spec:
+        if type(v) is int:
+            values.append(v)
+        elif isinstance(v, str) and _FRACTION_RE.fullmatch(v.strip()):
+            try:
+                f = Fraction(v.strip())
+            except ZeroDivisionError:
+                raise ValueError(f"{v!r} divides by zero") from None
+            values.append(f.numerator if f.denominator == 1 else f)
+        else:
+            raise ValueError(f"{v!r} is not an integer or a fraction like \"3/4\"")
+    return values
+
+# ---- NumPy: exact arithmetic on integer arrays
+
+def _load_numpy():
+    # optional: without it the tuples are solved one by one
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+    return np
+
+def _magnitude(a):
+    return int(abs(a).max()) if a.size else 0
+
+def _exact(np, op, a, b):
+    # a op b elementwise: in int64 when the result is sure to fit, in
+    # Python ints (object arrays) otherwise
+    if a.dtype != object and b.dtype != object:
+        bound = _magnitude(a) * _magnitude(b) if op is operator.mul else _magnitude(a) + _magnitude(b)
+        if bound < 2 ** 63:
+            return op(a, b)
+    return op(a.astype(object), b.astype(object))
+
+def _int_array(np, values):
+    # int64 unless a value does not fit (or is -2**63, whose abs() does not)
+    try:
+        a = np.array(values, dtype=np.int64)
+    except OverflowError:
+        return np.array(values, dtype=object)
+    return a.astype(object) if a.size and a.min() == -2 ** 63 else a
+
+def _reduce(np, n, d):
+    g = np.gcd(n, d)
+    return n // g, d // g
+
+def _evaluate_part(np, part, nums, dens, size):
+    # with fractional parameter values every term is brought over the common
+    # denominator: D * prod(den_j ** highest exponent of parameter j)
+    denominator, terms = part
+    top = [max((monom[j] for _, monom in terms), default=0) for j in range(len(nums))]
+    powers = {}
+
+    def power(column, j, e):
+        key = (column is dens, j, e)
+        if key not in powers:
+            base = column[j]
+            powers[key] = base if e == 1 else _exact(np, operator.mul, power(column, j, e - 1), base)
+        return powers[key]
+
+    total = np.zeros(size, dtype=np.int64)
+    for c, monom in terms:
+        term = np.broadcast_to(_int_array(np, c), size)
+        for j, e in enumerate(monom):
+            if e:
+                term = _exact(np, operator.mul, term, power(nums, j, e))
+            if dens[j] is not None and top[j] > e:
+                term = _exact(np, operator.mul, term, power(dens, j, top[j] - e))
+        total = _exact(np, operator.add, total, term)
+    den = np.broadcast_to(_int_array(np, denominator), size)
+    for j, t in enumerate(top):
+        if dens[j] is not None and t:
+            den = _exact(np, operator.mul, den, power(dens, j, t))
+    return _reduce(np, total, den)
+
+def _sub(np, x, y):
+    n = _exact(np, operator.sub, _exact(np, operator.mul, x[0], y[1]), _exact(np, operator.mul, y[0], x[1]))
+    return _reduce(np, n, _exact(np, operator.mul, x[1], y[1]))
+
+def _as_values(np, pair):
+    # ints where the denominator is 1, Fractions elsewhere
+    n, d = pair
+    if (d == 1).all():
+        return n.tolist()
+    return [a if b == 1 else Fraction(a, b) for a, b in zip(n.tolist(), d.tolist())]
+
+def _numpy_rows(np, tpl, columns, mode):
+    nums, dens = [], []
+    for values in columns:
+        if isinstance(values, range):
+            nums.append(_int_array(np, values))
+            dens.append(None)
+            continue
+        nums.append(_int_array(np, [v.numerator for v in values]))
+        den = _int_array(np, [v.denominator for v in values])
+        dens.append(None if (den == 1).all() else den)
+    if mode == "grid":
+        # parameter j repeats each value once per combination of the ones
+        # after it, and that block once per combination of the ones before
+        lengths = [len(n) for n in nums]
+        inner = [math.prod(lengths[j + 1:]) for j in range(len(lengths))]
+        outer = [math.prod(lengths[:j]) for j in range(len(lengths))]
+        nums = [np.tile(np.repeat(n, inner[j]), outer[j]) for j, n in enumerate(nums)]
+        dens = [None if d is None else np.tile(np.repeat(d, inner[j]), outer[j]) for j, d in enumerate(dens)]
+    else:
+        size = max(len(n) for n in nums)
+        nums = [np.broadcast_to(n, size) for n in nums]
+        dens = [None if d is None else np.broadcast_to(d, size) for d in dens]
+    size = nums[0].size
+    left_coeff, left_const, right_coeff, right_const = (_evaluate_part(np, part, nums, dens, size) for part in tpl.parts)
+    new_coeff = _sub(np, left_coeff, right_coeff)
+    rhs_after = _sub(np, right_const, left_const)
+    # rhs_after / new_coeff, with a placeholder denominator where it is 0
+    n = _exact(np, operator.mul, rhs_after[0], new_coeff[1])
+    d = _exact(np, operator.mul, rhs_after[1], new_coeff[0])
+    d = np.where(new_coeff[0] == 0, 1, d)
+    negative = d < 0
+    solution = _reduce(np, np.where(negative, -n, n), np.where(negative, -d, d))
+    pairs = (left_coeff, left_const, right_coeff, right_const, new_coeff, rhs_after)
+    # the solution is only printed, so it skips the Fractions
+    n, d = solution
+    texts = [f"{a}/{b}" if b != 1 else str(a) for a, b in zip(n.tolist(), d.tolist())]
+    return zip(*[_as_values(np, pair) for pair in pairs], texts)
+
+# ---- without NumPy: tuple by tuple
+
+def _evaluate_part_python(part, values):
+    denominator, terms = part
+    total = 0
+    for c, monom in terms:
+        for v, e in zip(values, monom):
+            if e:
+                c = c * v ** e
+        total += c
+    return Fraction(total, denominator)
+
+def _python_rows(tpl, columns, mode, count):
+    if mode == "grid":
+        tuples = itertools.product(*columns)
+    else:
+        tuples = zip(*[itertools.repeat(values[0], count) if len(values) == 1 else values for values in columns])
+    for values in tuples:
+        left_coeff, left_const, right_coeff, right_const = (_evaluate_part_python(part, values) for part in tpl.parts)
+        new_coeff = left_coeff - right_coeff
+        rhs_after = right_const - left_const
+        solution = rhs_after / new_coeff if new_coeff else None
+        yield left_coeff, left_const, right_coeff, right_const, new_coeff, rhs_after, solution
+
+def _instances(tpl, rows, steps):
+    var = tpl.var
+    memo = {}
+    for left_coeff, left_const, right_coeff, right_const, new_coeff, rhs_after, solution in rows:
+        if not new_coeff:
+            # with the unknown gone from both sides /solve finds no variable
+            body = (no_variable() if not left_coeff and not right_coeff else degenerate(not rhs_after))[0]
+            body["degenerate"] = "contradiction" if rhs_after else "identity"
+            yield body
+            continue
+        solution_pretty = f"{var} = {solution}"
+        if not steps:
+            yield dict(status="ok", solution=solution_pretty)
+            continue
+        yield dict(status="ok", steps=linear_steps(var, left_coeff, left_const, right_coeff, right_const,
+                                                    new_coeff, rhs_after, solution, memo),
+                   solution=solution_pretty)
+
+def solve_template(template, parameters, mode="zip", steps=True, max_instances=None):
+    """Solve a template for many parameter values; returns (error_response, None)
+    or (None, iterator of /solve bodies, one per parameter tuple).
+
+    parameters maps each name to a list of integers and "p/q" strings, or to
+    an inclusive {start, stop, step} range.  In "zip" mode tuple i takes
+    element i of every list (single values are repeated); in "grid" mode
+    every combination is solved, the first parameter varying slowest.
+    """
+    if not isinstance(template, str) or not template.strip():
+        return (dict(status="error", message="Empty template."), 400), None
+    if not isinstance(parameters, dict) or not parameters:
+        return (dict(status="error", message="Provide the values as \"parameters\": {name: values}."), 400), None
+    if mode not in ("zip", "grid"):
+        return (dict(status="error", message="mode must be \"zip\" or \"grid\"."), 400), None
+    columns = []
+    for name, spec in parameters.items():
+        try:
+            columns.append(_template_values(spec))
+        except ValueError as e:
+            return (dict(status="error", message=f"Bad values for {name} ({e})"), 400), None
+    lengths = [len(values) for values in columns]
+    if mode == "grid":
+        count = 1
+        for n in lengths:
+            count *= n
+    else:
+        count = max(lengths)
+        if any(n not in (1, count) for n in lengths):
+            return (dict(status="error", message="In zip mode all value lists must have the same length."), 400), None
+    if max_instances is not None and count > max_instances:
+        return (dict(status="error", message=f"Too many instances ({count}, limit is {max_instances})."), 400), None
+
+    error, tpl = compile_template(template, list(parameters))
+    if error is not None:
+        return error, None
+    np = _load_numpy()
+    rows = _numpy_rows(np, tpl, columns, mode) if np else _python_rows(tpl, columns, mode, count)
+    return None, _instances(tpl, rows, steps)
@@ -0,0 +1,79 @@
+import threading
+import time
+
+# -------------------
+# Process warm-up
+#
+# SymPy is imported lazily and much of it initializes on first use: the
+# first sp.simplify in a process pays for imports and first-time caches the
+# later ones do not (about 0.1 s, on top of the import).  warm() runs the
+# engines and every simplification stage on a few representative inputs,
+# one per class strategy.py tells apart, so a fresh process answers its
+# first request at full speed.  warm_stages() does the same for the
+# isolated stage workers, which get parsed expressions and no engines.
+# -------------------
+
+# one per expression class, and one needing sp.simplify itself
+EXPRESSIONS = (
+    "(x + y)**3 - (x - y)**3",
+    "(x**2 - 1)/(x - 1) + 1/(y + 1)",
+    "sin(x)**2 + cos(x)**2",
+    "exp(x)*exp(y) + sqrt(x)**2",
+    "gamma(x + 1)/gamma(x)",
+)
+# the fast linear path, the Poly path, the degree/coeff fallback with a
+# symbolic and with a decimal coefficient, an error
+EQUATIONS = ("9x + 8762 = 283 - 8x", "(x + 1)^2 = x^2 + 3", "2^(1/2)*x + 1 = 3", "0.5x + 1 = 2", "x^2 = 4")
+SYSTEM = ("x + y = 3", "x - y = 1")
+STAGES = ("expand", "cancel", "trigsimp", "powsimp", "simplify", "factor")
+
+_lock = threading.Lock()
+_thread = None
+# seconds the warm-up took, once it has finished in this process
+warm_seconds = None
+
+def warm_stages(stages):
+    """Run each stage function once on every representative expression."""
+    for text in EXPRESSIONS:
+        expr = stages["parse"](text)
+        for stage in STAGES:
+            stages[stage](expr)
+
+def warm():
+    """Import SymPy and run each engine and pipeline stage on representative
+    inputs; returns the seconds it took."""
+    global warm_seconds
+    from ._sympy import sp
+    from .evaluate import evaluate_expression
+    from .factoring import factor
+    from .linear import solve_equation
+    from .simplify import simplify_expression
+    from .system import solve_system
+    start = time.perf_counter()
+    warm_stages(dict(parse=sp.sympify, expand=sp.expand, cancel=sp.cancel, trigsimp=sp.trigsimp,
+                     powsimp=sp.powsimp, simplify=sp.simplify, factor=factor))
+    x, y = sp.symbols("x y")
+    poly = sp.expand((2*x + 3*y + 1)**3)
+    sp.degree(poly, x)
+    poly.coeff(x, 2)
+    sp.Poly(poly, x, domain=sp.QQ[y]).coeff_monomial(x)
+    for equation in EQUATIONS:
+        solve_equation(equation)
+    solve_system(list(SYSTEM))
+    for text in EXPRESSIONS:
+        simplify_expression(text)
+    # 501 without NumPy, which is then all there is to warm
+    evaluate_expression(EXPRESSIONS[3], {"x": [0.5, 1.0], "y": [0.5, 1.0]})
+    seconds = time.perf_counter() - start
+    warm_seconds = seconds
+    return seconds
+
+def warm_in_background():
+    """Start warm() in a daemon thread unless it has been started; returns
+    whether it has finished."""
+    global _thread
+    with _lock:
+        if _thread is None and warm_seconds is None:
+            _thread = threading.Thread(target=warm, name="mathchat-warm", daemon=True)
+            _thread.start()
+    return warm_seconds is not None
@@ -0,0 +1,298 @@
+from concurrent.futures import ProcessPoolExecutor
+from flask import Flask, Response, request, jsonify, stream_with_context
+import json
+import multiprocessing as mp
+import os
+import threading
+from .cache import ResultCache
+from .coalesce import SingleFlight
+from .compact import MEDIA_TYPES, compact_body, packb
+from .env import env_int
+from .evaluate import evaluate_expression
+from .linear import solve_batch, solve_equation
+from .metrics import Metrics, stopwatch
+from .pages import PAGES, SHELL, StaticPage
+from .simplify import simplify_events, simplify_expression, simplify_stream
+from .stage_pool import StagePool
+from .steps import render_body, render_step
+from .store import DiskStore
+from .sympy_cache import SympyCache
+from .system import solve_system
+from .template import solve_template
+from . import warmup
+
+# -------------------
+# One Flask app for both services
+#
+# The solver page is served at / and the simplifier page at /simplifier,
+# both rendered once at import and served as static bytes.
+# /solve and /simplify share the result cache (their keys are namespaced),
+# the metrics and the batch process pool.
+# -------------------
+
+app = Flask(__name__)
+# backed by a DiskStore when RESULT_STORE_PATH is set
+cache = ResultCache.from_env(store=DiskStore.from_env())
+# identical requests arriving together are computed once
+flights = SingleFlight.from_env()
+# per-stage timings, off unless METRICS_ENABLED=1
+metrics = Metrics.from_env()
+# None unless SIMPLIFY_ISOLATION_WORKERS is set
+pool = StagePool.from_env()
+# lambdified functions for /evaluate, keyed by expression
+compiled = ResultCache.from_env("EVALUATE_CACHE")
+# keeps SymPy's own caches from growing for the life of the process
+sympy_cache = SympyCache.from_env()
+
+BATCH_MAX_SIZE = env_int("SOLVE_BATCH_MAX_SIZE", 20000)
+SYSTEM_MAX_EQUATIONS = env_int("SOLVE_SYSTEM_MAX_EQUATIONS", 50000)
+TEMPLATE_MAX_INSTANCES = env_int("SOLVE_TEMPLATE_MAX_INSTANCES", 1_000_000)
+BATCH_WORKERS = env_int("BATCH_WORKERS", os.cpu_count() or 1)
+BATCH_WINDOW = env_int("SIMPLIFY_BATCH_WINDOW", 4 * BATCH_WORKERS)
+_executor = None
+_executor_lock = threading.Lock()
+
+def batch_executor():
+    # created on first use so importing this module never starts processes
+    global _executor
+    if BATCH_WORKERS <= 1:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            # never fork: the warm-up thread, the stage pool and coalesced
+            # waiters may hold locks a forked child would inherit
+            methods = mp.get_all_start_methods()
+            ctx = mp.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _executor = ProcessPoolExecutor(max_workers=BATCH_WORKERS, mp_context=ctx)
+        return _executor
+
+# ------------------- Pages -------------------
+
+PAGE_CACHE_CONTROL = os.environ.get("PAGE_CACHE_CONTROL") or "public, max-age=300"
+
+_shell = app.jinja_env.from_string(SHELL)
+static_pages = {name: StaticPage(_shell.render(page=page)) for name, page in PAGES.items()}
+
+def _serve_page(page):
+    encoding = page.encoding_for(request.accept_encodings)
+    body, etag = page.variants[encoding]
+    response = Response(body, mimetype="text/html")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = PAGE_CACHE_CONTROL
+    response.vary.add("Accept-Encoding")
+    if encoding != "identity":
+        response.headers["Content-Encoding"] = encoding
+    if etag in request.if_none_match:
+        # the client's copy is current: headers only
+        response.status_code = 304
+        response.set_data(b"")
+        response.headers.pop("Content-Encoding", None)
+        response.headers.pop("Content-Length", None)
+    return response
+
+@app.route("/")
+def index():
+    return _serve_page(static_pages["solver"])
+
+@app.route("/simplifier")
+def simplifier_page():
+    return _serve_page(static_pages["simplifier"])
+
+# ------------------- Response formats -------------------
+
+def _compact():
+    # MessagePack only when the client prefers it to JSON
+    return request.accept_mimetypes.best_match(("application/json",) + MEDIA_TYPES) in MEDIA_TYPES
+
+# seconds a client should wait after a 503 (no free stage worker)
+RETRY_AFTER = 1
+
+def _respond(kind, body, code, srepr):
+    # an engine's body as MessagePack with step records if negotiated, else
+    # as JSON with the steps rendered as sentences
+    if _compact():
+        response = Response(packb(compact_body(kind, body, srepr)), mimetype=MEDIA_TYPES[0])
+    else:
+        response = jsonify(render_body(kind, body, srepr))
+    response.status_code = code
+    if code == 503:
+        response.headers["Retry-After"] = str(RETRY_AFTER)
+    response.vary.add("Accept")
+    return response
+
+def _stream(kind, items, srepr):
+    # (index, body) pairs as NDJSON lines or concatenated MessagePack maps, as bytes
+    if _compact():
+        return (packb(compact_body(kind, dict(index=index, **body), srepr)) for index, body in items), MEDIA_TYPES[0]
+    lines = (dict(index=index, **render_body(kind, body, srepr)) for index, body in items)
+    return ((json.dumps(line) + "\n").encode() for line in lines), "application/x-ndjson"
+
+# ------------------- Solver -------------------
+
+@app.route("/solve", methods=["POST"])
+def solve():
+    data = request.get_json(force=True)
+    equation = data.get("equation")
+    debug = data.get("debug") is True
+    with metrics.request("solve", equation, debug) as timings:
+        body, code = solve_equation(equation, cache=cache, flights=flights)
+        if debug:
+            body = dict(body, timings=timings.as_dict())
+        mark = stopwatch()
+        response = _respond("solve", body, code, data.get("srepr") is not False)
+        mark("serialize")
+    return response
+
+@app.route("/solve/batch", methods=["POST"])
+def solve_many():
+    data = request.get_json(force=True)
+    equations = data.get("equations") if isinstance(data, dict) else None
+    if not isinstance(equations, list):
+        return _respond("solve", dict(status="error", message="Provide a list of equations as \"equations\"."), 400, True)
+    if len(equations) > BATCH_MAX_SIZE:
+        return _respond("solve", dict(status="error", message=f"Too many equations (limit is {BATCH_MAX_SIZE})."), 400, True)
+    results = solve_batch(equations, cache=cache, executor=batch_executor())
+    return _respond("solve", dict(status="ok", results=[body for body, _ in results]), 200,
+                    data.get("srepr") is not False)
+
+@app.route("/solve/system", methods=["POST"])
+def solve_linear_system():
+    data = request.get_json(force=True)
+    equations = data.get("equations") if isinstance(data, dict) else None
+    if not isinstance(equations, list):
+        return _respond("system", dict(status="error", message="Provide the system as a list of equations in \"equations\"."),
+                        400, True)
+    if len(equations) > SYSTEM_MAX_EQUATIONS:
+        return _respond("system", dict(status="error", message=f"Too many equations (limit is {SYSTEM_MAX_EQUATIONS})."),
+                        400, True)
+    body, code = solve_system(equations)
+    return _respond("system", body, code, True)
+
+# NDJSON lines (or MessagePack maps) per chunk written to the client
+TEMPLATE_CHUNK_LINES = 1000
+
+@app.route("/solve/template", methods=["POST"])
+def solve_parametric():
+    data = request.get_json(force=True)
+    if not isinstance(data, dict):
+        return _respond("solve", dict(status="error", message="Send a JSON object."), 400, True)
+    error, instances = solve_template(data.get("template"), data.get("parameters"), mode=data.get("mode", "zip"),
+                                      steps=data.get("steps") is not False, max_instances=TEMPLATE_MAX_INSTANCES)
+    if error is not None:
+        return _respond("solve", *error, True)
+
+    records, mimetype = _stream("solve", enumerate(instances), data.get("srepr") is not False)
+
+    def generate():
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) == TEMPLATE_CHUNK_LINES:
+                yield b"".join(chunk)
+                chunk = []
+        yield b"".join(chunk)
+
+    return Response(stream_with_context(generate()), mimetype=mimetype, headers={"Vary": "Accept"})
+
+# ------------------- Simplifier -------------------
+
+@app.route("/simplify", methods=["POST"])
+def simplify():
+    data = request.get_json(force=True)
+    expression = data.get("expression")
+    debug = data.get("debug") is True
+    with metrics.request("simplify", expression, debug) as timings:
+        body, code = simplify_expression(expression, cache=cache, pool=pool, flights=flights)
+        if debug:
+            body = dict(body, timings=timings.as_dict())
+        mark = stopwatch()
+        response = _respond("simplify", body, code, True)
+        mark("serialize")
+    return response
+
+@app.route("/simplify/stream", methods=["GET", "POST"])
+def simplify_sse():
+    # GET ?expression=... is what EventSource can send
+    if request.method == "GET":
+        expression = request.args.get("expression")
+    else:
+        expression = request.get_json(force=True).get("expression")
+
+    def generate():
+        for event, data in simplify_events(expression, cache=cache, pool=pool, flights=flights):
+            if event == "step":
+                data = dict(data, step=render_step("simplify", data["step"]))
+            else:
+                data = render_body("simplify", data)
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    # X-Accel-Buffering stops nginx from holding the events back
+    return Response(generate(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route("/evaluate", methods=["POST"])
+def evaluate():
+    data = request.get_json(force=True)
+    if not isinstance(data, dict):
+        return _respond("evaluate", dict(status="error", message="Send a JSON object."), 400, True)
+    with metrics.request("evaluate", data.get("expression")):
+        body, code = evaluate_expression(data.get("expression"), data.get("variables"),
+                                         mode=data.get("mode", "zip"), simplify=data.get("simplify") is not False,
+                                         cache=cache, compiled=compiled, pool=pool, flights=flights)
+        mark = stopwatch()
+        response = _respond("evaluate", body, code, True)
+        mark("serialize")
+    return response
+
+def _ndjson_expressions(stream):
+    # one expression per line, either a JSON string or {"expression": ...};
+    # a line that is not JSON becomes a ValueError reported at its index
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"Line {number}: invalid JSON ({e}).")
+            continue
+        yield item.get("expression") if isinstance(item, dict) else item
+
+@app.route("/simplify/batch", methods=["POST"])
+def simplify_many():
+    if request.mimetype == "application/x-ndjson":
+        expressions = _ndjson_expressions(request.stream)
+    else:
+        data = request.get_json(force=True)
+        expressions = data.get("expressions") if isinstance(data, dict) else None
+        if not isinstance(expressions, list):
+            return _respond("simplify", dict(status="error", message="Provide a list of expressions as \"expressions\"."),
+                            400, True)
+
+    records, mimetype = _stream("simplify", simplify_stream(expressions, batch_executor(), cache, BATCH_WINDOW), True)
+    return Response(stream_with_context(records), mimetype=mimetype, headers={"Vary": "Accept"})
+
+# ------------------- Monitoring -------------------
+
+@app.teardown_request
+def _sympy_housekeeping(exc):
+    sympy_cache.tick()
+
+@app.route("/ready")
+def ready():
+    # readiness probe: the first call starts the warm-up, and the process
+    # reports ready once it has finished
+    if not warmup.warm_in_background():
+        return jsonify(status="warming"), 503
+    return jsonify(status="ready", warm_seconds=round(warmup.warm_seconds, 3))
+
+@app.route("/metrics")
+def prometheus_metrics():
+    if not metrics.enabled:
+        return jsonify(status="error", message="Metrics are off (set METRICS_ENABLED=1)."), 404
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/stats")
+def stats():
+    return jsonify(cache=cache.stats(), compiled=compiled.stats(), coalesce=flights.stats(),
+                   pool=pool.stats() if pool else None, metrics=metrics.stats(), sympy_cache=sympy_cache.stats())
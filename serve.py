@@ -0,0 +1,505 @@
+import argparse
+import asyncio
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import functools
+import itertools
+import json
+import multiprocessing as mp
+import os
+import queue
+import threading
+from mathchat.env import env_float, env_int
+
+# -------------------
+# Production entry point: asyncio front end, Flask app in a process pool
+#
+# The ASGI callable below (`app`) only reads requests and writes responses.
+# Each request is handed whole to a worker process, which runs it through
+# the unchanged mathchat Flask app and returns the buffered response,
+# so a slow sp.simplify occupies one worker and never the event loop.  At
+# most workers + queue_depth requests are admitted at a time; beyond that
+# the front end answers 503 straight away.  Streaming and batch responses
+# (STREAMED_PATHS) are the exception to buffering: the worker passes each
+# chunk back through a queue as the app yields it, and the front end
+# forwards it at once.  The batch endpoints fan out over the same pool:
+# their worker hands each call back through that queue, and the front end
+# runs it on an idle worker, or returns it to be run in the batch's own
+# worker when none is idle (so batches never wait on each other's work).
+# Identical /solve and /simplify
+# requests (same normalized input) that arrive while one is being computed
+# wait for that worker call instead of taking a slot of their own.  Its own
+# counters are served at /serve/stats (the apps' /stats reflect whichever
+# worker answered).
+#
+#   python serve.py --port 8000         (needs uvicorn)
+#   uvicorn serve:app --port 8000
+#
+# Configuration comes from the environment:
+#   SERVE_WORKERS          worker processes (default: CPU count)
+#   SERVE_QUEUE_DEPTH      requests waiting for a worker (default 4 per worker)
+#   SERVE_REQUEST_TIMEOUT  seconds before a 504 (default 30)
+#   SERVE_MAX_BODY         request body limit in bytes (default 16 MiB)
+# -------------------
+
+_app = None
+
+def _init_worker():
+    global _app
+    # batch endpoints get a _PoolExecutor per request (see _handle_stream),
+    # so the app never starts a process pool of its own here
+    import mathchat
+    from mathchat.web import app as flask_app
+    # SymPy is imported lazily; pay for it before the first request
+    mathchat.warm()
+    _app = flask_app
+
+def _ready():
+    return os.getpid()
+
+def _environ(method, path, query_string, headers, body):
+    from werkzeug.test import EnvironBuilder
+    builder = EnvironBuilder(path=path, method=method, query_string=query_string,
+                             headers=headers, data=body)
+    try:
+        return builder.get_environ()
+    finally:
+        builder.close()
+
+def _handle(method, path, query_string, headers, body):
+    """Run one request through the Flask app; returns (status, headers, body)."""
+    from werkzeug.test import run_wsgi_app
+    environ = _environ(method, path, query_string, headers, body)
+    app_iter, status, response_headers = run_wsgi_app(_app, environ, buffered=True)
+    try:
+        data = b"".join(app_iter)
+    finally:
+        if hasattr(app_iter, "close"):
+            app_iter.close()
+    return int(status.split(" ", 1)[0]), list(response_headers.items()), data
+
+class _PoolExecutor(Executor):
+    """The batch executor of a worker serving a FANNED_OUT_PATHS request.
+
+    submit() puts ("task", (number, call)) on the request's channel; the
+    front end answers on replies with ("done", number, result), ("failed",
+    number, exception), or ("inline", number, None) to have it run here.
+    ("abandon", None, None) means the client is gone: what is left fails.
+    """
+
+    def __init__(self, channel, replies):
+        self._channel = channel
+        self._replies = replies
+        self._numbers = itertools.count()
+        # number -> (future, call), until its reply arrives
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self._abandoned = False
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        call = functools.partial(fn, *args, **kwargs)
+        with self._lock:
+            if self._abandoned:
+                future.set_exception(RuntimeError("Request abandoned"))
+                return future
+            number = next(self._numbers)
+            self._tasks[number] = (future, call)
+        self._channel.put(("task", (number, call)))
+        return future
+
+    def _read(self):
+        while True:
+            kind, number, value = self._replies.get()
+            if kind == "stop":
+                return
+            if kind == "abandon":
+                with self._lock:
+                    self._abandoned = True
+                    tasks, self._tasks = self._tasks, {}
+                for future, _ in tasks.values():
+                    future.set_exception(RuntimeError("Request abandoned"))
+                return
+            with self._lock:
+                future, call = self._tasks.pop(number)
+            if kind == "inline":
+                try:
+                    value = call()
+                except Exception as e:
+                    kind, value = "failed", e
+            if kind == "failed":
+                future.set_exception(value)
+            else:
+                future.set_result(value)
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        self._replies.put(("stop", None, None))
+        if wait:
+            self._reader.join()
+
+def _handle_stream(method, path, query_string, headers, body, channel, replies=None):
+    """Run one request through the Flask app unbuffered, putting ("start",
+    (status, headers)), one ("body", chunk) per chunk and ("end", None) on
+    channel as the response is produced.  With replies, the app's batch
+    work is fanned out through the front end (see _PoolExecutor)."""
+    from werkzeug.test import run_wsgi_app
+    from mathchat import web
+    executor = batch_executor = None
+    if replies is not None:
+        executor = _PoolExecutor(channel, replies)
+        batch_executor, web.batch_executor = web.batch_executor, lambda: executor
+    try:
+        environ = _environ(method, path, query_string, headers, body)
+        app_iter, status, response_headers = run_wsgi_app(_app, environ)
+        try:
+            channel.put(("start", (int(status.split(" ", 1)[0]), list(response_headers.items()))))
+            for chunk in app_iter:
+                if chunk:
+                    channel.put(("body", chunk))
+        finally:
+            if hasattr(app_iter, "close"):
+                app_iter.close()
+    finally:
+        if executor is not None:
+            web.batch_executor = batch_executor
+            executor.shutdown()
+        channel.put(("end", None))
+
+# responses passed on chunk by chunk rather than buffered
+STREAMED_PATHS = frozenset({"/simplify/stream", "/simplify/batch", "/solve/batch", "/solve/template"})
+# of those, the ones whose batch work is spread over the pool
+FANNED_OUT_PATHS = frozenset({"/simplify/batch", "/solve/batch"})
+# longest a blocking read of a stream's queue lasts, so a worker that dies
+# without ending its stream is noticed
+_STREAM_POLL = 0.5
+
+# larger bodies are never coalesced: normalizing them would hold up the event loop
+COALESCE_MAX_BODY = 64 * 1024
+_key_functions = None
+
+def _coalesce_key(method, path, body, accept=b""):
+    # the engines' cache key for the request's input, or None if it must
+    # not be shared (other routes, bad JSON, debug timings); the response
+    # format (Accept, srepr) is part of it
+    global _key_functions
+    if method != "POST" or path not in ("/solve", "/simplify") or len(body) > COALESCE_MAX_BODY:
+        return None
+    if _key_functions is None:
+        # parsing helpers only; SymPy stays out of the front end
+        from mathchat.linear import solve_key
+        from mathchat.simplify import simplify_key
+        _key_functions = {"/solve": ("equation", solve_key), "/simplify": ("expression", simplify_key)}
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return None
+    field, key_fn = _key_functions[path]
+    if not isinstance(data, dict) or data.get("debug") is True or not isinstance(data.get(field), str):
+        return None
+    key = key_fn(data[field])
+    return None if key is None else (path, key, accept, data.get("srepr") is not False)
+
+def _error(message):
+    return json.dumps(dict(status="error", message=message)).encode()
+
+class PoolApp:
+    """ASGI application serving the mathchat Flask app from a process pool."""
+
+    def __init__(self, workers=None, queue_depth=None, request_timeout=None, max_body=None):
+        self.workers = workers or env_int("SERVE_WORKERS", os.cpu_count() or 1)
+        if queue_depth is None:
+            queue_depth = env_int("SERVE_QUEUE_DEPTH", 4 * self.workers)
+        self.queue_depth = queue_depth
+        self.request_timeout = request_timeout or env_float("SERVE_REQUEST_TIMEOUT", 30.0)
+        self.max_body = max_body or env_int("SERVE_MAX_BODY", 16 * 1024 * 1024)
+        self.executor = None
+        self._warming = None
+        # owns the queues streamed responses come back through
+        self._manager = None
+        # admitted requests whose worker call has not finished yet; only
+        # touched from the event loop thread
+        self.in_flight = 0
+        # coalescing key -> the worker call computing it
+        self.flights = {}
+        self.rejected = 0
+        self.timeouts = 0
+        self.coalesced = 0
+        # batch calls run on a worker of their own
+        self.fanned_out = 0
+
+    def _context(self):
+        # never fork the event loop's process
+        return mp.get_context("forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn")
+
+    def _pool(self):
+        # created on first use so importing this module never starts processes
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=self._context(),
+                                                initializer=_init_worker)
+        return self.executor
+
+    def _channel(self):
+        # a queue a worker can stream a response back through
+        if self._manager is None:
+            self._manager = self._context().Manager()
+        return self._manager.Queue()
+
+    async def startup(self):
+        # start and warm every worker before taking traffic
+        loop = asyncio.get_running_loop()
+        pool = self._pool()
+        await asyncio.gather(*(loop.run_in_executor(pool, _ready) for _ in range(self.workers)))
+        if self._manager is None:
+            self._manager = await loop.run_in_executor(None, self._context().Manager)
+
+    def _restart_pool(self):
+        # a new pool, started and warmed in the background so the requests
+        # that follow do not each meet a cold worker
+        if self.executor is None:
+            return
+        self.executor = None
+        self._warming = asyncio.ensure_future(self._rewarm())
+
+    async def _rewarm(self):
+        try:
+            await self.startup()
+        except BrokenProcessPool:
+            self.executor = None
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _read_body(self, receive):
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > self.max_body:
+                return False
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    def stats(self):
+        return dict(workers=self.workers, queue_depth=self.queue_depth, in_flight=self.in_flight,
+                    rejected=self.rejected, timeouts=self.timeouts, coalesced=self.coalesced,
+                    fanned_out=self.fanned_out)
+
+    async def _http(self, scope, receive, send):
+        if scope["path"] == "/serve/stats":
+            # answered by the front end itself, so it works under overload
+            await _respond(send, 200, json.dumps(self.stats()).encode())
+            return
+        body = await self._read_body(receive)
+        if body is None:
+            return
+        if body is False:
+            await _respond(send, 413, _error("Request body too large."))
+            return
+        if scope["path"] in STREAMED_PATHS:
+            await self._stream(scope, body, send)
+            return
+        accept = b",".join(v for k, v in scope["headers"] if k == b"accept")
+        key = _coalesce_key(scope["method"], scope["path"], body, accept)
+        future = self.flights.get(key) if key is not None else None
+        if future is not None:
+            self.coalesced += 1
+        else:
+            future = await self._dispatch(scope, body, send)
+            if future is None:
+                return
+            if key is not None:
+                self.flights[key] = future
+                future.add_done_callback(lambda f: self._land(key, f))
+        try:
+            status, response_headers, data = await asyncio.wait_for(asyncio.shield(future), self.request_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            await _respond(send, 504, _error("Request timed out. Try simpler input."))
+            return
+        except BrokenProcessPool:
+            # a worker died (e.g. out of memory)
+            self._restart_pool()
+            await _respond(send, 503, _error("Worker process died. Try again shortly."),
+                           [(b"retry-after", b"1")])
+            return
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in response_headers],
+        })
+        await send({"type": "http.response.body", "body": data})
+
+    async def _stream(self, scope, body, send):
+        # forward a streaming response chunk by chunk (never coalesced: each
+        # client reads at its own pace)
+        channel = self._channel()
+        replies = self._channel() if scope["path"] in FANNED_OUT_PATHS else None
+        future = await self._dispatch(scope, body, send, _handle_stream, channel, replies)
+        if future is None:
+            return
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.request_timeout
+        started = ended = False
+        while True:
+            left = deadline - loop.time()
+            if left <= 0:
+                self.timeouts += 1
+                break
+            try:
+                kind, value = await loop.run_in_executor(None, channel.get, True, min(left, _STREAM_POLL))
+            except queue.Empty:
+                if future.done():
+                    # the worker died without ending the stream
+                    break
+                continue
+            if kind == "end":
+                ended = True
+                break
+            if kind == "task":
+                self._fan_out(value, replies)
+            elif kind == "start":
+                status, response_headers = value
+                await send({
+                    "type": "http.response.start",
+                    "status": status,
+                    "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in response_headers],
+                })
+                started = True
+            else:
+                await send({"type": "http.response.body", "body": value, "more_body": True})
+        if replies is not None and not ended:
+            # the worker may be waiting on calls nobody will pass on now
+            _reply(replies, "abandon", None, None)
+        if started:
+            # a timeout or a failure after the headers can only cut the stream short
+            await send({"type": "http.response.body", "body": b""})
+        elif loop.time() >= deadline:
+            await _respond(send, 504, _error("Request timed out. Try simpler input."))
+        else:
+            try:
+                await future
+            except BrokenProcessPool:
+                self._restart_pool()
+                await _respond(send, 503, _error("Worker process died. Try again shortly."),
+                               [(b"retry-after", b"1")])
+                return
+            except Exception:
+                pass
+            await _respond(send, 500, _error("Internal error."))
+
+    async def _dispatch(self, scope, body, send, handler=_handle, *extra):
+        # admit the request and hand it to a worker; None if it was answered here
+        if self.in_flight >= self.workers + self.queue_depth:
+            self.rejected += 1
+            await _respond(send, 503, _error("Server is busy. Try again shortly."),
+                           [(b"retry-after", b"1")])
+            return None
+
+        headers = [(k.decode("latin-1"), v.decode("latin-1")) for k, v in scope["headers"]]
+        request = (scope["method"], scope["path"], scope["query_string"].decode("latin-1"), headers, body)
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self._pool(), handler, *request, *extra)
+        except BrokenProcessPool:
+            self._restart_pool()
+            await _respond(send, 503, _error("Worker pool restarting. Try again shortly."),
+                           [(b"retry-after", b"1")])
+            return None
+        # the slot is held until the worker is done, even after a timeout,
+        # since the worker stays busy with it
+        self.in_flight += 1
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future):
+        self.in_flight -= 1
+
+    def _fan_out(self, task, replies):
+        # run one of a batch's calls on an idle worker; with none idle it goes
+        # back to the batch's worker, since queueing it could leave every
+        # worker waiting on calls queued behind the others
+        number, call = task
+        if self.in_flight >= self.workers:
+            _reply(replies, "inline", number, None)
+            return
+        try:
+            future = asyncio.get_running_loop().run_in_executor(self._pool(), call)
+        except BrokenProcessPool:
+            _reply(replies, "inline", number, None)
+            return
+        self.in_flight += 1
+        self.fanned_out += 1
+        future.add_done_callback(self._release)
+
+        def land(future):
+            if future.cancelled():
+                _reply(replies, "inline", number, None)
+            elif future.exception() is not None:
+                _reply(replies, "failed", number, future.exception())
+            else:
+                _reply(replies, "done", number, future.result())
+
+        future.add_done_callback(land)
+
+    def _land(self, key, future):
+        if self.flights.get(key) is future:
+            del self.flights[key]
+
+def _reply(replies, kind, number, value):
+    # a blocking call on the manager's queue, so it is made off the event loop
+    asyncio.get_running_loop().run_in_executor(None, replies.put, (kind, number, value))
+
+async def _respond(send, status, body, extra_headers=()):
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    headers.extend(extra_headers)
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+app = PoolApp()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve mathchat behind an asyncio front end.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        parser.exit(1, "serve.py needs an ASGI server: pip install uvicorn\n")
+    uvicorn.run(app, host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
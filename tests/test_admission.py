@@ -0,0 +1,62 @@
+"""Admission control: each limit rejects before anything is parsed, and
+high-degree dense inputs are simplified without the factor stage.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mathchat import admission, factoring, linear, simplify  # noqa: E402
+
+
+@pytest.mark.parametrize("text, limit", [
+    ("(" * 250 + "x" + ")" * 250, "parentheses nested 250 deep"),
+    ("9**9**9**9", "a number with over 10^300 digits"),
+    ("1" * 20000, "a number with 20000 digits"),
+    ("(x+1)**100000", "exponent 100000"),
+    ("x**600 * y**600", "degree 1200"),
+    ("(a+b+c+d+e+f)**40", "about 1.22e+06 terms once expanded"),
+])
+def test_each_limit_rejects(text, limit):
+    error = admission.check(text)[1]
+    assert error.startswith(f"Input too complex: {limit} (limit ")
+
+
+@pytest.mark.parametrize("text", ["(x+1)^2", "x**1000", "(x+1)**150", "sin(x)**2 + cos(x)**2"])
+def test_ordinary_input_is_admitted(text):
+    assert admission.check(text)[1] is None
+
+
+def test_rejected_before_parsing(monkeypatch):
+    def parse(*args):
+        raise AssertionError("parsed a rejected input")
+
+    monkeypatch.setattr(simplify, "parse_expr", parse)
+    body, code = simplify.simplify_expression("9**9**9**9")
+    assert code == 400
+    assert body["message"].startswith("Input too complex")
+    body, code = linear.solve_equation("x = 9**9**9**9")
+    assert code == 400
+    assert body["message"].startswith("Input too complex")
+
+
+@pytest.mark.parametrize("text, factored", [
+    ("(x+1)**150", False),
+    # sparse: factors quickly at any degree
+    ("x**150 + 1", True),
+    ("x**2 + 2*x + 1", True),
+])
+def test_dense_high_degree_skips_factor(monkeypatch, text, factored):
+    calls = []
+    factor = factoring.factor
+    monkeypatch.setattr(factoring, "factor", lambda expr: calls.append(expr) or factor(expr))
+    body, code = simplify.simplify_expression(text)
+    assert code == 200
+    assert bool(calls) == factored
+    assert admission.skip_factor(admission.measure(text)) != factored
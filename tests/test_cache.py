@@ -0,0 +1,114 @@
+"""ResultCache: LRU eviction by entry count and by size, TTL expiry, the
+environment settings and the disk store behind the persisted namespaces.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mathchat import cache as cache_module  # noqa: E402
+from mathchat.cache import ResultCache, _approx_size  # noqa: E402
+
+VALUE = (dict(status="ok", result="2*x", steps=[]), 200)
+
+
+def _key(i):
+    return ("simplify", f"x + {i}")
+
+
+def test_least_recently_used_goes_first():
+    cache = ResultCache(max_entries=3)
+    for i in range(3):
+        cache.put(_key(i), VALUE)
+    # a hit makes 0 the most recent, so 1 is evicted next
+    assert cache.get(_key(0)) == VALUE
+    cache.put(_key(3), VALUE)
+    assert cache.get(_key(1)) is None
+    assert [cache.get(_key(i)) is not None for i in (0, 2, 3)] == [True, True, True]
+    stats = cache.stats()
+    assert stats["entries"] == 3
+    assert stats["evictions"] == 1
+
+
+def test_replacing_a_key_keeps_one_entry():
+    cache = ResultCache(max_entries=2)
+    cache.put(_key(0), VALUE)
+    cache.put(_key(0), (dict(status="ok", result="x"), 200))
+    assert len(cache) == 1
+    assert cache.get(_key(0))[0]["result"] == "x"
+    assert cache.stats()["bytes"] == _approx_size(_key(0)) + _approx_size((dict(status="ok", result="x"), 200))
+
+
+def test_max_bytes_evicts_until_under_budget():
+    size = _approx_size(_key(0)) + _approx_size(VALUE)
+    cache = ResultCache(max_entries=100, max_bytes=int(size * 2.5))
+    for i in range(5):
+        cache.put(_key(i), VALUE)
+    assert len(cache) == 2
+    assert cache.stats()["bytes"] <= cache.max_bytes
+    assert cache.get(_key(4)) == VALUE
+    assert cache.get(_key(0)) is None
+
+
+def test_value_over_budget_is_not_stored():
+    cache = ResultCache(max_bytes=100)
+    cache.put(_key(0), VALUE)
+    assert len(cache) == 0
+    assert cache.stats()["bytes"] == 0
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = ResultCache(ttl=5)
+    cache.put(_key(0), VALUE)
+    now[0] += 4.9
+    assert cache.get(_key(0)) == VALUE
+    now[0] += 0.1
+    assert cache.get(_key(0)) is None
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["expirations"]) == (0, 0, 1)
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_settings_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv("TEST_CACHE_MAX_ENTRIES", "7")
+    monkeypatch.setenv("TEST_CACHE_MAX_BYTES", "4096")
+    monkeypatch.setenv("TEST_CACHE_TTL", "2.5")
+    cache = ResultCache.from_env("TEST_CACHE")
+    assert (cache.max_entries, cache.max_bytes, cache.ttl) == (7, 4096, 2.5)
+    with pytest.raises(ValueError):
+        ResultCache(max_entries=0)
+
+
+class _Store:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def put(self, key, value):
+        self.data[key] = value
+
+    def stats(self):
+        return dict(entries=len(self.data))
+
+
+def test_only_persisted_namespaces_reach_the_store():
+    store = _Store()
+    cache = ResultCache(store=store)
+    cache.put(("simplify-srepr", "Symbol('x')", True), VALUE)
+    cache.put(_key(0), VALUE)
+    assert list(store.data) == [("simplify-srepr", "Symbol('x')", True)]
+    # a miss in memory falls through to the store and is kept in memory
+    cache.clear()
+    assert cache.get(("simplify-srepr", "Symbol('x')", True)) == VALUE
+    assert cache.get(_key(0)) is None
+    assert len(cache) == 1
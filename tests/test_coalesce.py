@@ -0,0 +1,106 @@
+"""SingleFlight: followers share the leader's result, and compute for
+themselves when the leader fails, is abandoned or stalls past the timeout.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+from concurrent.futures import ThreadPoolExecutor
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mathchat import simplify  # noqa: E402
+from mathchat.coalesce import SingleFlight  # noqa: E402
+
+
+class _Slow:
+    # fn for SingleFlight.run: the first call blocks until released
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.fail = fail
+        self._lock = threading.Lock()
+
+    def __call__(self, value):
+        with self._lock:
+            self.calls += 1
+            first = self.calls == 1
+        if first:
+            self.started.set()
+            self.release.wait(10)
+            if self.fail:
+                raise RuntimeError("leader failed")
+        return value
+
+
+def _followers(flights, key, fn, count):
+    # start the leader, then count followers once it is under way
+    pool = ThreadPoolExecutor(count + 1)
+    leader = pool.submit(flights.run, key, fn, "leader")
+    assert fn.started.wait(10)
+    followers = [pool.submit(flights.run, key, fn, "follower") for _ in range(count)]
+    while flights.stats()["followers"] < count:
+        threading.Event().wait(0.01)
+    return pool, leader, followers
+
+
+def test_followers_share_the_leaders_result():
+    flights = SingleFlight()
+    fn = _Slow()
+    pool, leader, followers = _followers(flights, "k", fn, 3)
+    fn.release.set()
+    assert leader.result() == "leader"
+    assert [f.result() for f in followers] == ["leader"] * 3
+    assert fn.calls == 1
+    pool.shutdown()
+    assert flights.stats() == dict(in_flight=0, leaders=1, followers=3, timeouts=0)
+    # nothing is kept once the leader is done
+    assert flights.run("k", fn, "again") == "again"
+
+
+def test_leader_failure_leaves_followers_to_compute():
+    flights = SingleFlight()
+    fn = _Slow(fail=True)
+    pool, leader, followers = _followers(flights, "k", fn, 2)
+    fn.release.set()
+    with pytest.raises(RuntimeError):
+        leader.result()
+    assert [f.result() for f in followers] == ["follower"] * 2
+    assert fn.calls == 3
+    pool.shutdown()
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_stalled_leader_times_out():
+    flights = SingleFlight(timeout=0.05)
+    fn = _Slow()
+    pool, leader, followers = _followers(flights, "k", fn, 2)
+    assert [f.result(10) for f in followers] == ["follower"] * 2
+    assert not leader.done()
+    assert flights.stats()["timeouts"] == 2
+    fn.release.set()
+    assert leader.result() == "leader"
+    pool.shutdown()
+
+
+def test_abandoned_streaming_leader_hands_over():
+    # a client that closes its stream mid-way must not leave waiters empty-handed
+    flights = SingleFlight()
+    leader = simplify.simplify_steps("(x + 1)**3 - x**3", flights=flights)
+    next(leader)
+    assert flights.stats()["in_flight"] == 1
+    with ThreadPoolExecutor(1) as pool:
+        follower = pool.submit(simplify.simplify_expression, "(x+1)**3 - x**3", flights=flights)
+        while flights.stats()["followers"] < 1:
+            threading.Event().wait(0.01)
+        leader.close()
+        body, code = follower.result(10)
+    assert code == 200
+    assert body == simplify.simplify_expression("(x + 1)**3 - x**3")[0]
+    assert flights.stats()["in_flight"] == 0
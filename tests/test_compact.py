@@ -0,0 +1,76 @@
+"""The built-in MessagePack encoder: known bytes for every type and size
+boundary, and the same bytes as the msgpack package where it is installed.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mathchat import compact  # noqa: E402
+from mathchat.steps import step  # noqa: E402
+
+
+@pytest.fixture
+def builtin(monkeypatch):
+    monkeypatch.setattr(compact, "msgpack", None)
+    return compact.packb
+
+
+@pytest.mark.parametrize("obj, hex_bytes", [
+    (None, "c0"), (True, "c3"), (False, "c2"),
+    (0, "00"), (127, "7f"), (-1, "ff"), (-32, "e0"), (-33, "d0df"), (-128, "d080"),
+    (128, "cc80"), (255, "ccff"), (256, "cd0100"), (-129, "d1ff7f"), (65535, "cdffff"),
+    (65536, "ce00010000"), (-32769, "d2ffff7fff"), (2 ** 32, "cf0000000100000000"),
+    (-(2 ** 31) - 1, "d3ffffffff7fffffff"), (2 ** 64 - 1, "cfffffffffffffffff"),
+    (1.5, "cb3ff8000000000000"),
+    ("", "a0"), ("é", "a2c3a9"), ("a" * 31, "bf" + "61" * 31), ("a" * 32, "d920" + "61" * 32),
+    ("a" * 256, "da0100" + "61" * 256), (b"", "c400"), (b"\x00" * 256, "c50100" + "00" * 256),
+    ([], "90"), ((1, 2), "920102"), ([0] * 16, "dc0010" + "00" * 16),
+    ({}, "80"), ({"a": 1}, "81a16101"), ({i: None for i in range(16)}, "de0010" + "".join(f"{i:02x}c0" for i in range(16))),
+])
+def test_known_bytes(builtin, obj, hex_bytes):
+    assert builtin(obj).hex() == hex_bytes
+
+
+def test_long_lengths_use_32_bits(builtin):
+    assert builtin("a" * 65536)[:5].hex() == "db00010000"
+    assert builtin(b"a" * 65536)[:5].hex() == "c600010000"
+    assert builtin([None] * 65536)[:5].hex() == "dd00010000"
+    assert builtin({i: None for i in range(65536)})[:5].hex() == "df00010000"
+
+
+@pytest.mark.parametrize("obj, error", [(2 ** 64, OverflowError), (-(2 ** 63) - 1, OverflowError),
+                                        ({1, 2}, TypeError), (object(), TypeError)])
+def test_unpackable(builtin, obj, error):
+    with pytest.raises(error):
+        builtin(obj)
+
+
+def _bodies(rng):
+    # response-shaped values: step records, strings of every length class, numbers
+    for _ in range(300):
+        length = rng.choice([0, 5, 31, 32, 255, 256, 70000])
+        yield dict(status="ok", index=rng.randint(-2 ** 40, 2 ** 40), elapsed=rng.random(),
+                   steps=[step("combine", rng.randint(-300, 300), "x" * length, result=rng.random())],
+                   data=bytes(rng.getrandbits(8) for _ in range(rng.choice([0, 3, 300]))),
+                   results=[None, True, [] if rng.random() < 0.5 else list(range(rng.randint(0, 20)))])
+
+
+def test_same_bytes_as_msgpack(builtin):
+    msgpack = pytest.importorskip("msgpack")
+    for body in _bodies(random.Random(11)):
+        assert builtin(body) == msgpack.packb(body, use_bin_type=True)
+
+
+def test_compact_body_sends_records_and_raw_bytes():
+    body = dict(status="ok", steps=[step("original", "Symbol('x')", "Integer(1)"), step("simplify", "x", result=1)])
+    assert compact.compact_body("solve", body, srepr=False)["steps"] == [["simplify", ["x"], "1"]]
+    assert compact.compact_body("solve", body) is body
+    assert compact.compact_body("evaluate", dict(status="ok", data="AAE=")) == dict(status="ok", data=b"\x00\x01")
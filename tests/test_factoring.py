@@ -0,0 +1,87 @@
+"""factoring.factor against sp.factor: the same result wherever full
+factorization runs, the cheap irreducibility proofs never wrong, and parts
+over FACTOR_BUDGET left whole.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mathchat import factoring  # noqa: E402
+from mathchat._sympy import sp  # noqa: E402
+
+x, y, z = sp.symbols("x y z")
+
+POLYNOMIALS = [
+    "2*x**2*y + 4*x",
+    "x**2 - 2*x + 1",
+    "-x**3 + x",
+    "x**2/4 - y**2/9",
+    "3*x*y + 6*y + 5*x + 10",
+    "x*y + y*z + z*x",
+    "x**4 + 1",
+    "(x + y)**3*(x - 2*z)**2",
+    "(x**2 + y**2 + 1)*(x*y - 3)",
+    "6*x**5*y**2 - 6*x*y**2",
+    "(2*x + 3)**4",
+    "x**3*y**3 - 1",
+]
+
+
+@pytest.mark.parametrize("text", POLYNOMIALS)
+def test_same_as_sp_factor(text):
+    expr = sp.expand(sp.sympify(text))
+    assert factoring.factor(expr) == sp.factor(expr)
+
+
+def test_random_products_match_sp_factor():
+    rng = random.Random(3)
+    gens = (x, y, z)
+    for _ in range(40):
+        factors = []
+        for _ in range(rng.randint(1, 3)):
+            terms = [rng.randint(-4, 4) * sp.Mul(*(g ** rng.randint(0, 2) for g in gens[:rng.randint(1, 3)]))
+                     for _ in range(rng.randint(1, 4))]
+            factors.append(sp.Add(*terms) ** rng.randint(1, 2))
+        expr = sp.expand(sp.Mul(*factors))
+        if expr.is_Add:
+            assert factoring.factor(expr) == sp.factor(expr), expr
+
+
+def test_cheap_irreducibility_proofs_agree_with_sympy():
+    rng = random.Random(5)
+    proven = 0
+    for _ in range(60):
+        expr = sp.Add(*(rng.randint(-5, 5) * x ** rng.randint(0, 3) * y ** rng.randint(0, 2) for _ in range(4)))
+        if not expr.free_symbols >= {x, y}:
+            continue
+        poly = sp.Poly(expr, x, y)
+        poly = poly.primitive()[1]
+        if poly.sqf_list()[1] != [(poly, 1)] and poly.sqf_list()[1] != [(-poly, 1)]:
+            continue
+        if factoring._irreducible(poly):
+            assert poly.is_irreducible, expr
+            proven += 1
+    assert proven > 10
+
+
+@pytest.mark.parametrize("text", ["sin(x)**2 - 1", "(x**2 - 1)/(x - 1)", "0.5*x**2 - 0.5", "x**2 - 2", "x"])
+def test_other_expressions_go_to_sp_factor(text):
+    expr = sp.sympify(text)
+    assert factoring.factor(expr) == sp.factor(expr)
+
+
+def test_parts_over_budget_are_left_whole(monkeypatch):
+    expr = sp.expand(3 * x * (x**2 - y**2) * (x + 1)**2)
+    monkeypatch.setattr(factoring, "FACTOR_BUDGET", 1)
+    result = factoring.factor(expr)
+    # content, monomial and square-free parts are still taken out
+    assert result == 3 * x * (x + 1)**2 * (x**2 - y**2)
+    assert sp.expand(result) == expr
@@ -0,0 +1,97 @@
+"""The single-pass parser against the original preprocess + sympify path:
+same text, same SymPy expression (srepr), and Unsupported wherever the
+original grammar has to decide.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+from fractions import Fraction
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mathchat._sympy import sp  # noqa: E402
+from mathchat.linear import LINEAR  # noqa: E402
+from mathchat.parsing import (Unsupported, canonical, normalize, parse, parse_sympy, preprocess_expr,  # noqa: E402
+                              preprocess_side, tokenize)
+
+SIDES = ["9x + 3", "2(x+1) - 4", "(x+1)(x-1)", "(x+1)x", "x2y", "−3x ^ 2", "x/2 - 1/3", "0.5x", "-(-x)",
+         "3 - 2(x + 4)/5", "12x+0"]
+EXPRESSIONS = ["(x + 1)^2", "x**2 - 2*x + 1", "−x^−2", "a/b/c", "2**-1", "1.50*x", "-2**2", "x - -y",
+               "((x))", "y**0.5 * y"]
+
+_ALPHABET = ["x", "y", "2", "3", "0", "1", ".", "(", ")", "+", "-", "*", "/", "^", "**", " ", "−", "ab", "x2", "7"]
+
+
+def _reference(text, implicit_mul):
+    pre = (preprocess_side if implicit_mul else preprocess_expr)(text)
+    try:
+        return pre, sp.srepr(sp.sympify(pre))
+    except Exception:
+        return pre, None
+
+
+def _check(text, implicit_mul):
+    try:
+        tokens = tokenize(text, implicit_mul)
+    except Unsupported:
+        return False
+    pre, reference = _reference(text, implicit_mul)
+    assert canonical(tokens) == pre
+    try:
+        mine = sp.srepr(parse_sympy(tokens))
+    except Unsupported:
+        return False
+    assert mine == reference, text
+    return True
+
+
+@pytest.mark.parametrize("text", SIDES)
+def test_equation_sides_match_sympify(text):
+    assert _check(text, True)
+
+
+@pytest.mark.parametrize("text", EXPRESSIONS)
+def test_expressions_match_sympify(text):
+    assert _check(text, False)
+
+
+def test_random_inputs_match_sympify():
+    rng = random.Random(7)
+    parsed = 0
+    for _ in range(3000):
+        text = "".join(rng.choice(_ALPHABET) for _ in range(rng.randint(1, 8)))
+        # chained powers can take sympify arbitrarily long
+        if text.count("^") + text.count("*") > 2:
+            continue
+        parsed += _check(text, True) + _check(text, False)
+    assert parsed > 500
+
+
+@pytest.mark.parametrize("text", ["x(", "2 * * x", "sin(x)", "pi*x", "x $ 1", "007", "x y", ""])
+def test_outside_the_grammar_falls_back(text):
+    # the caller then goes through preprocess + sympify with its messages
+    pre, tokens = normalize(text)
+    assert pre == preprocess_expr(text)
+    if tokens is not None:
+        with pytest.raises(Unsupported):
+            parse_sympy(tokens)
+
+
+@pytest.mark.parametrize("text", ["9x + 3", "2(x+1) - x/4", "3 - 2(x + 4)/5", "x"])
+def test_linear_forms_match_sympify(text):
+    coeffs, const = parse(tokenize(text, True), LINEAR)
+    expr = sum((sp.Rational(c.numerator, c.denominator) * sp.Symbol(n) for n, c in coeffs.items()), sp.S(0))
+    assert expr + sp.Rational(const.numerator, const.denominator) == sp.sympify(preprocess_side(text))
+    assert all(isinstance(c, Fraction) for c in coeffs.values())
+
+
+@pytest.mark.parametrize("text", ["x*y", "x**2", "1/x", "0.5x"])
+def test_non_linear_is_unsupported_by_the_linear_builder(text):
+    with pytest.raises(Unsupported):
+        parse(tokenize(text, True), LINEAR)
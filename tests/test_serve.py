@@ -0,0 +1,101 @@
+"""serve.PoolApp: batch and template responses are streamed through the
+front end, and batch work is fanned out over the serving pool.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serve  # noqa: E402
+from mathchat import linear, web  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def loop():
+    # one event loop throughout, as under a server: the pool's callbacks
+    # (releasing slots) run on it after a response is sent
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="module")
+def pool_app(loop):
+    app = serve.PoolApp(workers=2, queue_depth=4, request_timeout=60)
+    loop.run_until_complete(app.startup())
+    yield app
+    app.shutdown()
+
+
+def _call(loop, app, path, body, content_type="application/json"):
+    # one request through the ASGI callable; returns (status, [body chunks])
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": path, "query_string": b"",
+             "headers": [(b"content-type", content_type.encode())]}
+    loop.run_until_complete(app(scope, receive, send))
+    assert sent[0]["type"] == "http.response.start"
+    return sent[0]["status"], [m["body"] for m in sent[1:] if m["body"]]
+
+
+def _in_process(monkeypatch, path, body, content_type="application/json"):
+    monkeypatch.setattr(web, "batch_executor", lambda: None)
+    web.cache.clear()
+    return web.app.test_client().post(path, data=body, content_type=content_type).get_data()
+
+
+def _lines(data):
+    return sorted((json.loads(line) for line in data.decode().splitlines()), key=lambda r: r["index"])
+
+
+def test_simplify_batch_streams_and_fans_out(loop, pool_app, monkeypatch):
+    expressions = [f"(x + {i})^2 - x^2" for i in range(40)] + ["x +", 5]
+    body = "\n".join(json.dumps(e) for e in expressions).encode()
+    fanned = pool_app.fanned_out
+    status, chunks = _call(loop, pool_app, "/simplify/batch", body, "application/x-ndjson")
+    assert status == 200
+    # one chunk per line, forwarded as the worker produced it
+    assert len(chunks) == len(expressions)
+    assert pool_app.fanned_out > fanned
+    assert _lines(b"".join(chunks)) == _lines(_in_process(monkeypatch, "/simplify/batch", body, "application/x-ndjson"))
+
+
+def test_solve_batch_keeps_order_and_fans_out(loop, pool_app, monkeypatch):
+    equations = [f"{i % 7 + 2}x + {i} = {i * 3}" for i in range(linear.PARALLEL_THRESHOLD + 100)] + ["nonsense"]
+    body = json.dumps({"equations": equations}).encode()
+    fanned = pool_app.fanned_out
+    status, chunks = _call(loop, pool_app, "/solve/batch", body)
+    assert status == 200
+    assert pool_app.fanned_out > fanned
+    assert json.loads(b"".join(chunks)) == json.loads(_in_process(monkeypatch, "/solve/batch", body))
+
+
+def test_template_is_streamed_in_chunks(loop, pool_app, monkeypatch):
+    body = json.dumps({"template": "a*x + b = 7", "mode": "grid", "steps": False,
+                       "parameters": {"a": {"start": 1, "stop": 30}, "b": {"start": 0, "stop": 99}}}).encode()
+    status, chunks = _call(loop, pool_app, "/solve/template", body)
+    assert status == 200
+    assert len(chunks) == 3000 // web.TEMPLATE_CHUNK_LINES
+    assert b"".join(chunks) == _in_process(monkeypatch, "/solve/template", body)
+
+
+def test_stats_count_fanned_out_calls(loop, pool_app):
+    status, chunks = _call(loop, pool_app, "/serve/stats", b"")
+    assert status == 200
+    stats = json.loads(b"".join(chunks))
+    assert stats["fanned_out"] == pool_app.fanned_out > 0
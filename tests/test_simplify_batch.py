@@ -0,0 +1,85 @@
+"""/simplify/batch: every index answered once, per-item errors, the bounded
+in-flight window, NDJSON line errors and the batch executor's start method.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+import os
+import json
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mathchat import simplify, web  # noqa: E402
+from mathchat.cache import ResultCache  # noqa: E402
+
+EXPRESSIONS = ["(x + 1)^2", "sin(x)^2 + cos(x)^2", 5, "", "(x^2 - 1)/(x - 1)", "x +", "2*x + 3*x"]
+
+
+@pytest.fixture(scope="module")
+def executor():
+    ctx = mp.get_context("forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn")
+    with ProcessPoolExecutor(max_workers=2, mp_context=ctx) as executor:
+        yield executor
+
+
+def _check(results):
+    results = dict(results)
+    assert sorted(results) == list(range(len(EXPRESSIONS)))
+    for index, expr in enumerate(EXPRESSIONS):
+        if isinstance(expr, str):
+            assert results[index] == simplify.simplify_expression(expr)[0]
+    assert results[2] == dict(status="error", message="Expression must be a string.")
+    assert results[3]["status"] == "error"
+    assert results[5]["status"] == "error"
+
+
+def test_in_process():
+    _check(simplify.simplify_stream(EXPRESSIONS))
+
+
+def test_executor_answers_every_index(executor):
+    cache = ResultCache()
+    _check(simplify.simplify_stream(EXPRESSIONS, executor, cache, window=2))
+    # ok results were cached in the parent; the next batch needs no worker
+    _check(simplify.simplify_stream(EXPRESSIONS, None, cache))
+
+
+def test_input_is_consumed_lazily(executor):
+    pulled = []
+
+    def expressions():
+        for i in range(20):
+            pulled.append(i)
+            yield f"(x + {i})^2"
+
+    stream = simplify.simplify_stream(expressions(), executor, window=3)
+    next(stream)
+    assert len(pulled) <= 3
+    assert len(list(stream)) == 19
+
+
+def test_batch_executor_does_not_fork(monkeypatch):
+    monkeypatch.setattr(web, "BATCH_WORKERS", 2)
+    monkeypatch.setattr(web, "_executor", None)
+    executor = web.batch_executor()
+    try:
+        assert executor._mp_context.get_start_method() in ("forkserver", "spawn")
+    finally:
+        executor.shutdown()
+
+
+def test_ndjson_names_the_malformed_line(monkeypatch):
+    monkeypatch.setattr(web, "batch_executor", lambda: None)
+    body = '"2*x + 3*x"\n\n{"expression": 5}\n{"expression": "x\n'
+    response = web.app.test_client().post("/simplify/batch", data=body, content_type="application/x-ndjson")
+    results = {r.pop("index"): r for r in map(json.loads, response.get_data(as_text=True).splitlines())}
+    assert results[0]["status"] == "ok"
+    assert results[1] == dict(status="error", message="Expression must be a string.")
+    assert results[2]["status"] == "error"
+    assert results[2]["message"].startswith("Line 4: invalid JSON (")
@@ -0,0 +1,58 @@
+"""/solve/batch: results in input order, per-item errors, deduplication and
+the process-pool fan-out agreeing with the in-process path.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mathchat import linear, web  # noqa: E402
+from mathchat.cache import ResultCache  # noqa: E402
+
+
+def test_results_in_input_order_with_per_item_errors():
+    equations = ["2x + 1 = 5", 7, "", "x + y = 1", "3y = 9", "x = (1", "0.5z = 2", "2x + 1 = 5"]
+    results = linear.solve_batch(equations)
+    assert len(results) == len(equations)
+    for eq, result in zip(equations, results):
+        if isinstance(eq, str):
+            assert result == linear.solve_equation(eq)
+    assert results[1] == (dict(status="error", message="Equation must be a string."), 400)
+    assert results[2][1] == 400
+    assert results[3][1] == 400
+    assert results[4][0]["solution"] == "y = 3"
+
+
+def test_equal_equations_are_solved_once():
+    cache = ResultCache()
+    results = linear.solve_batch(["2x = 4", "2x=4", " 2x = 4 "], cache=cache)
+    assert results[0] is results[1] is results[2]
+    assert len(cache) == 1
+    # a second batch is served from the cache
+    assert linear.solve_batch(["2x = 4"], cache=cache)[0] is results[0]
+
+
+def test_fan_out_matches_in_process():
+    equations = [f"{i}x + {i % 7} = {i * 3}" for i in range(1, linear.PARALLEL_THRESHOLD + 100)]
+    equations += ["0.25x = 1", "x^2 = 1", 3]
+    ctx = mp.get_context("forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn")
+    with ProcessPoolExecutor(max_workers=2, mp_context=ctx) as executor:
+        fanned = linear.solve_batch(equations, executor=executor)
+    assert fanned == linear.solve_batch(equations)
+
+
+def test_route_keeps_order(monkeypatch):
+    monkeypatch.setattr(web, "batch_executor", lambda: None)
+    web.cache.clear()
+    client = web.app.test_client()
+    equations = ["x = 1", "2x = 6", "nonsense", "4x = 16"]
+    body = client.post("/solve/batch", json={"equations": equations}).get_json()
+    assert [r.get("solution") for r in body["results"]] == ["x = 1", "x = 3", None, "x = 4"]
+    response = client.post("/solve/batch", json={"equations": "x = 1"})
+    assert response.status_code == 400
@@ -0,0 +1,103 @@
+"""StagePool deadlines, kills and the busy path, and how /simplify maps them.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mathchat import simplify, web  # noqa: E402
+from mathchat._sympy import sp  # noqa: E402
+from mathchat.stage_pool import PoolBusy, StageError, StagePool, StageTimeout  # noqa: E402
+
+# sympify of a power tower does not return within any test's patience
+ENDLESS = "9**9**9**9"
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = StagePool(size=1, stage_timeout=2.0, request_timeout=4.0)
+    # the first call waits for the worker to start and warm up
+    assert pool.run("expand", sp.sympify("(x + 1)**2"), 120) == sp.sympify("x**2 + 2*x + 1")
+    yield pool
+    pool.close()
+
+
+def test_runs_stages(pool):
+    assert pool.run("parse", "x + x", 10) == sp.sympify("2*x")
+    assert pool.run("factor", sp.sympify("x**2 - 1"), 10) == sp.sympify("(x - 1)*(x + 1)")
+
+
+def test_stage_error_keeps_the_worker(pool):
+    restarts = pool.restarts
+    with pytest.raises(StageError):
+        pool.run("parse", "x +", 10)
+    assert pool.restarts == restarts
+    assert pool.run("parse", "x", 10) == sp.Symbol("x")
+
+
+def test_overrun_kills_and_replaces_the_worker(pool):
+    restarts = pool.restarts
+    with pytest.raises(StageTimeout) as e:
+        pool.run("parse", ENDLESS, 0.5)
+    assert not isinstance(e.value, PoolBusy)
+    assert pool.restarts == restarts + 1
+    # the replacement warms up before it takes the next stage
+    assert pool.run("parse", "2*y", 120) == sp.sympify("2*y")
+
+
+def test_no_free_worker_is_busy(pool):
+    # the only worker is held by an overrunning stage
+    held = threading.Thread(target=lambda: pytest.raises(StageTimeout, pool.run, "parse", ENDLESS, 2.0))
+    held.start()
+    try:
+        threading.Event().wait(0.2)
+        with pytest.raises(PoolBusy):
+            pool.run("parse", "x", 0.3)
+    finally:
+        held.join()
+    assert pool.run("parse", "z", 120) == sp.Symbol("z")
+
+
+def test_expired_deadline_times_out_at_once(pool):
+    with pytest.raises(StageTimeout):
+        pool.run("parse", "x", 0)
+
+
+class _BusyAfter:
+    """A pool whose workers are all taken from the nth stage call on."""
+
+    stage_timeout = 1.0
+    request_timeout = 2.0
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def run(self, stage, arg, timeout):
+        if self.calls == 0:
+            raise PoolBusy(stage)
+        self.calls -= 1
+        return simplify.parse_expr(arg, None) if stage == "parse" else getattr(sp, stage)(arg)
+
+
+@pytest.mark.parametrize("calls", [0, 1, 2])
+def test_busy_pool_is_503_at_any_stage(calls):
+    # 0: at parse time, 1: at expand, 2: between simplify stages
+    body, code = simplify.simplify_expression("(x + 1)**2 - x**2", pool=_BusyAfter(calls))
+    assert code == 503
+    assert body["status"] == "error"
+
+
+def test_busy_pool_sends_retry_after(monkeypatch):
+    monkeypatch.setattr(web, "pool", _BusyAfter(1))
+    web.cache.clear()
+    response = web.app.test_client().post("/simplify", json={"expression": "(x + 2)**2"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(web.RETRY_AFTER)
+    assert response.get_json()["status"] == "error"
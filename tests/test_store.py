@@ -0,0 +1,54 @@
+"""DiskStore round trips and the settings fingerprint in its keys.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mathchat import factoring, simplify  # noqa: E402
+from mathchat.cache import ResultCache  # noqa: E402
+from mathchat.store import CHECK_EVERY, DiskStore  # noqa: E402
+
+KEY = ("simplify-srepr", "Add(Symbol('x'), Integer(1))", True)
+VALUE = (dict(status="ok", steps=[["factor", [], "x + 1"]], result="x + 1"), 200)
+
+
+def test_round_trip_across_instances(tmp_path):
+    path = str(tmp_path / "results.db")
+    DiskStore(path).put(KEY, VALUE)
+    assert DiskStore(path).get(KEY) == VALUE
+
+
+def test_strategy_and_budget_are_part_of_the_key(tmp_path, monkeypatch):
+    path = str(tmp_path / "results.db")
+    DiskStore(path).put(KEY, VALUE)
+    monkeypatch.setattr(simplify, "STRATEGY", "full")
+    assert DiskStore(path).get(KEY) is None
+    monkeypatch.setattr(simplify, "STRATEGY", "auto")
+    monkeypatch.setattr(factoring, "FACTOR_BUDGET", factoring.FACTOR_BUDGET + 1)
+    assert DiskStore(path).get(KEY) is None
+    monkeypatch.undo()
+    assert DiskStore(path).get(KEY) == VALUE
+
+
+def test_simplify_results_survive_a_restart(tmp_path):
+    path = str(tmp_path / "results.db")
+    first = simplify.simplify_expression("sin(x)^2 + cos(x)^2 + (x + 1)^2", cache=ResultCache(store=DiskStore(path)))
+    store = DiskStore(path)
+    again = simplify.simplify_expression("sin(x)^2 + cos(x)^2 + (x + 1)^2", cache=ResultCache(store=store))
+    assert again == first
+    assert store.hits == 1
+
+
+def test_entry_limit_evicts_least_recently_used(tmp_path):
+    # limits are checked every CHECK_EVERY writes
+    store = DiskStore(str(tmp_path / "results.db"), max_entries=10)
+    for i in range(2 * CHECK_EVERY):
+        store.put(("solve-srepr", str(i)), VALUE)
+    assert store.stats()["entries"] <= 10
+    assert store.get(("solve-srepr", str(2 * CHECK_EVERY - 1))) == VALUE
+    assert store.get(("solve-srepr", "0")) is None
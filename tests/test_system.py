@@ -0,0 +1,113 @@
+"""solve_system: the step-by-step and summary exact paths against SymPy, the
+sparse LU and pure-Python float paths against a known solution, and
+degenerate systems on each path.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+from fractions import Fraction
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mathchat import system  # noqa: E402
+from mathchat._sympy import sp  # noqa: E402
+
+
+def _banded(n, seed=1, rows=None):
+    # a diagonally dominant system in x1..xn with a known integer solution
+    rng = random.Random(seed)
+    solution = {f"x{i}": rng.randint(-9, 9) for i in range(1, n + 1)}
+    equations = []
+    for i in range(1, (rows or n) + 1):
+        i = (i - 1) % n + 1
+        terms = {f"x{i}": rng.randint(5, 9)}
+        for j in (i - 1, i + 2):
+            if 1 <= j <= n:
+                terms[f"x{j}"] = rng.randint(-2, 2) or 1
+        rhs = sum(c * solution[name] for name, c in terms.items())
+        equations.append(" + ".join(f"{c}*{name}" for name, c in terms.items()) + f" = {rhs}")
+    return equations, solution
+
+
+def _sympy_solution(equations):
+    exprs = [sp.sympify(lhs) - sp.sympify(rhs) for lhs, rhs in (eq.split("=") for eq in equations)]
+    symbols = sorted(set().union(*(e.free_symbols for e in exprs)), key=lambda s: s.name)
+    (values,) = sp.linsolve(exprs, symbols)
+    return {s.name: str(v) for s, v in zip(symbols, values)}
+
+
+def test_small_system_is_exact_with_steps():
+    equations = ["2x + 3y = 7", "x/2 - y = 1/3"]
+    body, code = system.solve_system(equations)
+    assert code == 200
+    assert body["method"] == "exact"
+    assert body["solution"] == _sympy_solution(["2*x + 3*y = 7", "x/2 - y = 1/3"])
+    assert body["steps"][0] == ["system", ["2", "2", "x, y"], None]
+    assert [s[0] for s in body["steps"][-2:]] == ["back_substitute", "back_substitute"]
+
+
+def test_medium_system_is_exact_with_a_summary():
+    equations, _ = _banded(system.STEP_LIMIT + 12)
+    body, code = system.solve_system(equations)
+    assert code == 200
+    assert body["method"] == "exact" and "steps" not in body
+    assert body["summary"]["unknowns"] == system.STEP_LIMIT + 12
+    assert body["solution"] == _sympy_solution(equations)
+
+
+def test_decimals_stay_exact():
+    body, _ = system.solve_system(["0.1x + 0.2y = 0.3", "x - y = 0"])
+    assert body["solution"] == {"x": "1", "y": "1"}
+    assert system._fraction(sp.Float("0.1")) == Fraction(1, 10)
+
+
+@pytest.mark.parametrize("scipy", [True, False])
+def test_large_system_uses_floats(monkeypatch, scipy):
+    if not scipy:
+        monkeypatch.setattr(system, "_scipy", False)
+    elif not system._load_scipy():
+        pytest.skip("SciPy is not installed")
+    n = system.EXACT_LIMIT + 50
+    equations, solution = _banded(n)
+    body, code = system.solve_system(equations)
+    assert code == 200
+    assert body["method"] == ("sparse-lu" if scipy else "sparse-elimination")
+    assert body["summary"]["unknowns"] == n
+    for name, value in solution.items():
+        assert body["solution"][name] == pytest.approx(value, abs=1e-9)
+
+
+def test_overdetermined_large_system_falls_back_to_elimination():
+    n = system.EXACT_LIMIT + 10
+    equations, solution = _banded(n, rows=n + 5)
+    body, code = system.solve_system(equations)
+    assert code == 200
+    assert body["method"] == "sparse-elimination"
+    assert body["solution"]["x1"] == pytest.approx(solution["x1"], abs=1e-9)
+
+
+@pytest.mark.parametrize("n", [4, system.EXACT_LIMIT + 10])
+def test_degenerate_systems(n):
+    equations, _ = _banded(n)
+    contradiction = system.solve_system(equations + [equations[0].split("=")[0] + "= 1000"])
+    assert contradiction[0]["message"].startswith("No solution (contradiction).")
+    infinite = system.solve_system(equations[:-1] + [equations[0]])
+    assert infinite[0]["message"].startswith("Infinite solutions.")
+
+
+@pytest.mark.parametrize("equations, message", [
+    ([], "Empty system."),
+    (["x + y = 1", 3], "Equation 2: must be a string."),
+    (["x*y = 1"], "Equation 1: "),
+    (["1 = 1"], "No variable detected."),
+])
+def test_rejected_input(equations, message):
+    body, code = system.solve_system(equations)
+    assert code == 400
+    assert body["message"].startswith(message)
@@ -0,0 +1,101 @@
+"""/solve/template: the NumPy and pure-Python paths give the same bodies as
+/solve on each substituted equation, including values past int64.
+
+Run from the repository root:
+
+    python -m pytest tests
+"""
+from fractions import Fraction
+import operator
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mathchat import linear, template  # noqa: E402
+
+np = template._load_numpy()
+
+CASES = [
+    ("a*x + b = c*x + d", {"a": [2, 3, "1/2", 0], "b": [1, -4, "5/3", 2], "c": [0, 3, "1/2", 0], "d": [7, -4, 2, 2]}),
+    ("a(x - b) = 2x + b/3", {"a": {"start": -3, "stop": 3}, "b": [5]}),
+    ("a*b*x + c = d*x", {"a": [2 ** 40, -(2 ** 40), 7], "b": [2 ** 30, 2 ** 31, "1/9"],
+                         "c": [2 ** 62, -(2 ** 63), 10 ** 30], "d": [1, 2 ** 63, -3]}),
+    ("a**2*x - b = a*x", {"a": [3 * 10 ** 9, -(2 ** 32), "7/5"], "b": [2 ** 63 - 1, 1, 0]}),
+]
+
+
+def _solve(tpl, params, mode="zip", steps=True):
+    error, instances = template.solve_template(tpl, params, mode=mode, steps=steps)
+    assert error is None
+    return list(instances)
+
+
+def _substituted(tpl, params):
+    # each zip-mode tuple as its own /solve equation
+    columns = {name: template._template_values(spec) for name, spec in params.items()}
+    count = max(len(values) for values in columns.values())
+    for i in range(count):
+        eq = tpl
+        for name, values in columns.items():
+            eq = eq.replace(name, f"({values[i if len(values) > 1 else 0]})")
+        yield eq
+
+
+@pytest.mark.parametrize("tpl, params", CASES)
+def test_each_instance_matches_solve(tpl, params):
+    for body, eq in zip(_solve(tpl, params), _substituted(tpl, params)):
+        expected = linear.solve_equation(eq)[0]
+        assert {k: v for k, v in body.items() if k != "degenerate"} == expected, eq
+
+
+@pytest.mark.skipif(np is None, reason="NumPy is not installed")
+@pytest.mark.parametrize("mode", ["zip", "grid"])
+@pytest.mark.parametrize("tpl, params", CASES)
+def test_numpy_and_pure_python_agree(monkeypatch, tpl, params, mode):
+    fast = _solve(tpl, params, mode)
+    monkeypatch.setattr(template, "_load_numpy", lambda: None)
+    assert _solve(tpl, params, mode) == fast
+
+
+def test_grid_order_and_degenerate_lines():
+    bodies = _solve("a*x = b", {"a": [0, 2], "b": [0, 4]}, mode="grid", steps=False)
+    assert [b.get("degenerate") or b["solution"] for b in bodies] == ["identity", "contradiction", "x = 0", "x = 2"]
+    assert "steps" not in bodies[-1]
+
+
+@pytest.mark.skipif(np is None, reason="NumPy is not installed")
+def test_int64_overflow_switches_to_python_ints():
+    big = np.array([2 ** 62, -(2 ** 62)], dtype=np.int64)
+    product = template._exact(np, operator.mul, big, big)
+    assert product.dtype == object
+    assert list(product) == [2 ** 124, 2 ** 124]
+    small = template._exact(np, operator.add, np.array([1, 2]), np.array([3, 4]))
+    assert small.dtype == np.int64
+    assert template._int_array(np, [1, 2 ** 64]).dtype == object
+    assert template._int_array(np, [1, -(2 ** 63)]).dtype == object
+    assert template._int_array(np, [1, 2 ** 63 - 1]).dtype == np.int64
+
+
+@pytest.mark.parametrize("tpl, params, message", [
+    ("", {"a": [1]}, "Empty template."),
+    ("a*x = 1", {}, "Provide the values"),
+    ("a*x = 1", {"a": [1.5]}, "Bad values for a"),
+    ("a*x = b", {"a": [1, 2], "b": [1, 2, 3]}, "In zip mode all value lists must have the same length."),
+    ("a*x**2 = 1", {"a": [1]}, "The template must be linear in x."),
+])
+def test_rejected_templates(tpl, params, message):
+    error, instances = template.solve_template(tpl, params)
+    assert instances is None
+    body, code = error
+    assert code == 400
+    assert body["message"].startswith(message)
+
+
+def test_instance_limit():
+    error, _ = template.solve_template("a*x = b", {"a": {"start": 1, "stop": 100}, "b": {"start": 1, "stop": 100}},
+                                       mode="grid", max_instances=9999)
+    assert error[0]["message"] == "Too many instances (10000, limit is 9999)."
+    assert template._template_values(["3/4", -2]) == [Fraction(3, 4), -2]